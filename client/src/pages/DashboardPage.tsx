@@ -4,6 +4,7 @@ import logo from '../assets/logo.svg'
 import viewIcon from '../assets/view-icon.svg'
 import deleteIcon from '../assets/delete-icon.svg'
 import Footer from '../components/layout/Footer'
+import { waitForBlueprint } from '../services/blueprint'
 
 interface UploadedFile {
   id: string
@@ -180,24 +181,13 @@ export default function DashboardPage() {
       // 3. Trigger Blueprint Generation
       results.forEach(async (res) => {
         try {
-          const genRes = await fetch(`${SERVICE_URL}/api/v1/generate-blueprint/${res.document_id}`, {
-            method: 'POST',
-          })
+          // Generation runs server-side; poll until the PDF is ready.
+          // The ResultsPage downloads it using the document_id
+          await waitForBlueprint(SERVICE_URL, res.document_id)
 
-          if (genRes.ok) {
-            const pdfBlob = await genRes.blob()
-            // Store the PDF blob URL in local state only for immediate use if needed
-            // But we don't need to store it in localStorage since it won't persist
-            // The ResultsPage will re-fetch it using the document_id
-            
-            setDocuments(prev => prev.map(doc => 
-              doc.id === res.document_id ? { ...doc, status: 'Success' } : doc
-            ))
-          } else {
-            setDocuments(prev => prev.map(doc => 
-              doc.id === res.document_id ? { ...doc, status: 'Failed' } : doc
-            ))
-          }
+          setDocuments(prev => prev.map(doc => 
+            doc.id === res.document_id ? { ...doc, status: 'Success' } : doc
+          ))
         } catch (err) {
           console.error(`Generation error for ${res.name}:`, err)
           setDocuments(prev => prev.map(doc => 
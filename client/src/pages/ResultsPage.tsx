@@ -2,6 +2,7 @@ import { useNavigate, useParams, Link } from 'react-router-dom'
 import { useState, useEffect, useRef } from 'react'
 import logo from '../assets/logo.svg'
 import Footer from '../components/layout/Footer'
+import { BlueprintRequestError, fetchBlueprintPdf, waitForBlueprint } from '../services/blueprint'
 
 export default function ResultsPage() {
   const navigate = useNavigate()
@@ -28,26 +29,22 @@ export default function ResultsPage() {
       setError(null)
       
       try {
-        const res = await fetch(`${SERVICE_URL}/api/v1/generate-blueprint/${id}`, {
-          method: 'POST'
-        })
-        
-        if (res.ok) {
-          const blob = await res.blob()
-          if (blob.size > 0) {
-            const pdfBlob = new Blob([blob], { type: 'application/pdf' })
-            currentUrl = URL.createObjectURL(pdfBlob)
-            setPdfUrl(currentUrl)
-          } else {
-            setError('The generated blueprint is empty. Please try regenerating it from the dashboard.')
-          }
+        await waitForBlueprint(SERVICE_URL, id)
+        const blob = await fetchBlueprintPdf(SERVICE_URL, id)
+        if (blob.size > 0) {
+          const pdfBlob = new Blob([blob], { type: 'application/pdf' })
+          currentUrl = URL.createObjectURL(pdfBlob)
+          setPdfUrl(currentUrl)
         } else {
-          const errorData = await res.json().catch(() => ({}))
-          setError(errorData.detail || `Generation failed (Status ${res.status}). This often happens due to AI service rate limits.`)
+          setError('The generated blueprint is empty. Please try regenerating it from the dashboard.')
         }
       } catch (err) {
         console.error('Failed to fetch PDF:', err)
-        setError('Could not connect to the server. Please ensure the backend is running.')
+        if (err instanceof BlueprintRequestError) {
+          setError(err.message)
+        } else {
+          setError('Could not connect to the server. Please ensure the backend is running.')
+        }
       } finally {
         setIsLoading(false)
       }
@@ -0,0 +1,58 @@
+const POLL_INTERVAL_MS = 2000
+
+type BlueprintStatus = {
+  status: 'pending' | 'running' | 'completed' | 'failed'
+  task_id: string
+  error?: string | null
+}
+
+// Error reported by the server (as opposed to a network failure)
+export class BlueprintRequestError extends Error {}
+
+const readDetail = async (res: Response, fallback: string) => {
+  const errorData = await res.json().catch(() => ({}))
+  return errorData.detail || fallback
+}
+
+// Starts blueprint generation (a no-op if it is already running or done)
+// and resolves once the PDF is ready
+export const waitForBlueprint = async (serviceUrl: string, documentId: string) => {
+  const startRes = await fetch(`${serviceUrl}/api/v1/generate-blueprint/${documentId}`, {
+    method: 'POST'
+  })
+  if (!startRes.ok) {
+    throw new BlueprintRequestError(
+      await readDetail(startRes, `Generation failed (Status ${startRes.status}).`)
+    )
+  }
+
+  let job: BlueprintStatus = await startRes.json()
+  while (job.status !== 'completed') {
+    if (job.status === 'failed') {
+      throw new BlueprintRequestError(
+        job.error || 'Generation failed. This often happens due to AI service rate limits.'
+      )
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS))
+
+    const statusRes = await fetch(`${serviceUrl}/api/v1/blueprint/${documentId}/status`)
+    if (!statusRes.ok) {
+      throw new BlueprintRequestError(
+        await readDetail(statusRes, `Status check failed (Status ${statusRes.status}).`)
+      )
+    }
+    job = await statusRes.json()
+  }
+}
+
+// Downloads a generated blueprint PDF
+export const fetchBlueprintPdf = async (serviceUrl: string, documentId: string) => {
+  const res = await fetch(`${serviceUrl}/api/v1/blueprint/${documentId}`)
+  if (!res.ok) {
+    throw new BlueprintRequestError(
+      await readDetail(res, `Download failed (Status ${res.status}).`)
+    )
+  }
+  return res.blob()
+}
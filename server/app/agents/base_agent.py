@@ -1,14 +1,38 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-import json
+from typing import Dict, Any, List, Optional, Tuple, Union
+from functools import lru_cache
+import asyncio
+import hashlib
 import logging
-from app.services.llm import GroqService
+import orjson
+import tiktoken
+from diskcache import Cache
+from app.services.llm import GroqService, LLMWorkerPool
+from app.services.cache import SemanticLLMCache
 
 
 # Set up logger for agents
 logger = logging.getLogger(__name__)
 
 
+def _encoding_for(model: str) -> tiktoken.Encoding:
+    """Tokenizer for a model, falling back to cl100k_base for non-OpenAI models."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=64)
+def _tokenize_prompt(model: str, prompt: str) -> Tuple[int, ...]:
+    """
+    Tokenize a system prompt once per (model, prompt).
+    
+    Agents of the same class share one prompt, so they share the result.
+    """
+    return tuple(_encoding_for(model).encode(prompt))
+
+
 class BaseAgent(ABC):
     """
     Base agent abstraction for all agent implementations.
@@ -26,42 +50,91 @@ class BaseAgent(ABC):
         system_prompt: The system prompt for the agent
         model: The LLM model to use
         temperature: Temperature for LLM responses
+        cache: Optional semantic response cache consulted before the LLM
+        worker_pool: Optional shared worker pool that carries async LLM calls
+        exact_cache: Optional persistent exact-match cache used at temperature 0
     """
     
+    # Fixed text every user message of the agent starts with; the semantic
+    # cache matches prompts on what follows it
+    STATIC_USER_PREFIX = ""
+    
     def __init__(
         self,
         system_prompt: str,
         llm_service: Optional[GroqService] = None,
         model: str = "llama-3.1-8b-instant",
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        cache: Optional[SemanticLLMCache] = None,
+        worker_pool: Optional[LLMWorkerPool] = None,
+        exact_cache: Optional[Cache] = None
     ):
         """
         Initialize the base agent.
         
         Args:
             system_prompt: The system prompt that defines the agent's behavior
-            llm_service: Optional GroqService instance (creates new one if not provided)
+            llm_service: Optional GroqService instance (default: the shared GroqService.instance())
             model: The LLM model to use (default: llama-3.1-8b-instant)
             temperature: Temperature for LLM responses (default: 0.7)
+            cache: Optional semantic response cache (default: no caching)
+            worker_pool: Optional LLMWorkerPool for async calls (default: call
+                llm_service directly)
+            exact_cache: Optional diskcache.Cache consulted before any other
+                layer when temperature is 0 (default: disabled)
         """
-        self.llm_service = llm_service or GroqService()
+        self.llm_service = llm_service or GroqService.instance()
         self.system_prompt = system_prompt
         self.model = model
         self.temperature = temperature
+        self.cache = cache
+        self.worker_pool = worker_pool
+        self.exact_cache = exact_cache
+        self._system_tokens: Optional[Tuple[int, ...]] = None
     
-    def _call_llm(self, user_message: str) -> str:
+    @property
+    def system_tokens(self) -> Tuple[int, ...]:
         """
-        Call the LLM service with the system prompt and user message.
+        Token IDs of the system prompt, computed on first use and reused.
+        
+        Groq and OpenAI chat endpoints only accept text, so the prompt is
+        still sent as a string; the IDs serve token accounting without
+        re-encoding the prompt on every call.
+        """
+        if self._system_tokens is None:
+            self._system_tokens = _tokenize_prompt(self.model, self.system_prompt)
+        return self._system_tokens
+    
+    def count_prompt_tokens(self, user_message: str) -> int:
+        """
+        Count the input tokens of a request, reusing the cached system prompt tokens.
         
         Args:
             user_message: The user's message/prompt
         
         Returns:
-            Raw response from LLM
-        
-        Raises:
-            Exception: If LLM call fails
+            Token count of system prompt plus user message (excluding
+            per-message chat framing)
         """
+        user_tokens = len(_encoding_for(self.model).encode(user_message))
+        return len(self.system_tokens) + user_tokens
+    
+    def _log_request(self, user_message: str) -> None:
+        """Log the prompt size of an outgoing LLM request at debug level."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "llm_request",
+                extra={
+                    "agent": type(self).__name__,
+                    "model": self.model,
+                    "system_tokens": len(self.system_tokens),
+                    "prompt_tokens": self.count_prompt_tokens(user_message),
+                }
+            )
+    
+    def _generate(self, user_message: str) -> str:
+        """Send the prompt to the LLM service, bypassing the cache."""
+        self._log_request(user_message)
         return self.llm_service.generate_response(
             user_message=user_message,
             system_message=self.system_prompt,
@@ -69,6 +142,115 @@ class BaseAgent(ABC):
             temperature=self.temperature
         )
     
+    async def _agenerate(self, user_message: str) -> str:
+        """Async variant of _generate, routed through the worker pool when set."""
+        self._log_request(user_message)
+        generate = (
+            self.worker_pool.agenerate_response if self.worker_pool is not None
+            else self.llm_service.agenerate_response
+        )
+        return await generate(
+            user_message=user_message,
+            system_message=self.system_prompt,
+            model=self.model,
+            temperature=self.temperature
+        )
+    
+    def _exact_cache_key(self, user_message: str) -> Optional[str]:
+        """
+        Key for the exact-match cache, or None when it does not apply.
+        
+        Only temperature-0 responses are deterministic enough to replay.
+        """
+        if self.exact_cache is None or self.temperature != 0:
+            return None
+        
+        payload = orjson.dumps(
+            {
+                "model": self.model,
+                "temperature": self.temperature,
+                "system": self.system_prompt,
+                "user": user_message,
+            },
+            option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.sha256(payload).hexdigest()
+    
+    def _call_llm(self, user_message: str) -> str:
+        """
+        Call the LLM service with the system prompt and user message.
+        
+        At temperature 0 the exact-match cache is consulted first; otherwise
+        the semantic cache is consulted when one is configured.
+        
+        Args:
+            user_message: The user's message/prompt
+        
+        Returns:
+            Raw response from LLM
+        
+        Raises:
+            Exception: If LLM call fails
+        """
+        exact_key = self._exact_cache_key(user_message)
+        if exact_key is not None:
+            response = self.exact_cache.get(exact_key)
+            if response is not None:
+                return response
+        
+        if self.cache is None:
+            response = self._generate(user_message)
+        else:
+            response = self.cache.get_or_generate(
+                self.system_prompt,
+                user_message,
+                self.model,
+                self.temperature,
+                lambda: self._generate(user_message),
+                agent_name=type(self).__name__,
+                static_prefix=self.STATIC_USER_PREFIX
+            )
+        
+        if exact_key is not None:
+            self.exact_cache.set(exact_key, response)
+        return response
+    
+    async def _acall_llm(self, user_message: str) -> str:
+        """
+        Async variant of _call_llm.
+        
+        Args:
+            user_message: The user's message/prompt
+        
+        Returns:
+            Raw response from LLM
+        
+        Raises:
+            Exception: If LLM call fails
+        """
+        exact_key = self._exact_cache_key(user_message)
+        if exact_key is not None:
+            response = await asyncio.to_thread(self.exact_cache.get, exact_key)
+            if response is not None:
+                return response
+        
+        if self.cache is None:
+            response = await self._agenerate(user_message)
+        else:
+            response = await self.cache.aget_or_generate(
+                self.system_prompt,
+                user_message,
+                self.model,
+                self.temperature,
+                lambda: self._agenerate(user_message),
+                agent_name=type(self).__name__,
+                static_prefix=self.STATIC_USER_PREFIX
+            )
+        
+        if exact_key is not None:
+            await asyncio.to_thread(self.exact_cache.set, exact_key, response)
+        return response
+    
     @abstractmethod
     def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -85,6 +267,22 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def _aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of _process.
+        
+        Subclasses with a native async path should override this. The default
+        runs the synchronous _process in a worker thread so the event loop
+        is never blocked.
+        
+        Args:
+            input_data: Input data dictionary
+        
+        Returns:
+            Output data dictionary
+        """
+        return await asyncio.to_thread(self._process, input_data)
+    
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute the agent with input data.
@@ -105,17 +303,117 @@ class BaseAgent(ABC):
             Exception: If processing fails
         """
         # Log input
-        logger.info(f"[{self.__class__.__name__}] Input: {json.dumps(input_data, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Input", extra={"agent": type(self).__name__, "payload": input_data})
         
         try:
             # Process input
             output = self._process(input_data)
             
             # Log output
-            logger.info(f"[{self.__class__.__name__}] Output: {json.dumps(output, indent=2)}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Output", extra={"agent": type(self).__name__, "payload": output})
             
             return output
         except Exception as e:
-            logger.error(f"[{self.__class__.__name__}] Error: {str(e)}")
+            logger.exception(
+                "agent_error",
+                extra={"agent": type(self).__name__, "err_type": type(e).__name__}
+            )
             raise
-
+    
+    async def aexecute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of execute.
+        
+        Same logging contract as execute, but awaits _aprocess so independent
+        agents can run concurrently on one event loop.
+        
+        Args:
+            input_data: Input data dictionary
+        
+        Returns:
+            Output data dictionary
+        
+        Raises:
+            Exception: If processing fails
+        """
+        # Log input
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Input", extra={"agent": type(self).__name__, "payload": input_data})
+        
+        try:
+            # Process input
+            output = await self._aprocess(input_data)
+            
+            # Log output
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Output", extra={"agent": type(self).__name__, "payload": output})
+            
+            return output
+        except Exception as e:
+            logger.exception(
+                "agent_error",
+                extra={"agent": type(self).__name__, "err_type": type(e).__name__}
+            )
+            raise
+    
+    async def run_batch_async(
+        self,
+        inputs: List[Dict[str, Any]],
+        concurrency: int = 8
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Execute the agent on many inputs concurrently.
+        
+        At most `concurrency` inputs are in flight at once. A failing input
+        does not abort the batch; its exception is returned in its place.
+        
+        Args:
+            inputs: Input data dictionaries
+            concurrency: Maximum number of concurrent executions (default: 8)
+        
+        Returns:
+            Output dictionaries or exceptions, in input order
+        
+        Raises:
+            ValueError: If concurrency is not a positive integer
+        """
+        if concurrency <= 0:
+            raise ValueError("concurrency must be a positive integer")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _run_one(input_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.aexecute(input_data)
+        
+        return await asyncio.gather(
+            *(_run_one(input_data) for input_data in inputs),
+            return_exceptions=True
+        )
+    
+    def run_batch(
+        self,
+        inputs: List[Dict[str, Any]],
+        concurrency: int = 8
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Synchronous wrapper around run_batch_async for callers without an event loop.
+        
+        The event loop's async LLM client is closed before the loop is.
+        
+        Args:
+            inputs: Input data dictionaries
+            concurrency: Maximum number of concurrent executions (default: 8)
+        
+        Returns:
+            Output dictionaries or exceptions, in input order
+        """
+        async def run() -> List[Union[Dict[str, Any], BaseException]]:
+            try:
+                return await self.run_batch_async(inputs, concurrency)
+            finally:
+                await GroqService.aclose()
+        
+        return asyncio.run(run())
@@ -1,6 +1,10 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
+import hashlib
 import logging
+import orjson
 from app.agents.base_agent import BaseAgent
+from app.utils.context_budget import ContextBudgeter
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,34 @@ You are a Lead GenAI Solutions Strategist. Your final task is to synthesize the
 - OUTPUT FORMAT: Provide the complete Statement of Work in high-quality markdown format.
 """
 
+# Static scaffolding of the user message, including the formatting rules.
+# Dynamic content is appended last so repeated calls share the longest
+# possible prompt prefix.
+_STATIC_HEADER = """Synthesize the sections below into a final Proposal Statement of Work (SOW) for a GenAI Implementation.
+
+### Formatting Instructions:
+1. Use **bold** for emphasis.
+2. Use # for main headers and ## for subheaders.
+3. Use bullet points for lists.
+4. Ensure logical flow and a professional consulting tone.
+5. DO NOT use other markdown features like tables or code blocks unless absolutely necessary for the Mermaid diagram.
+
+Produce the final synthesized Proposal SOW.
+
+### CURRENT STATE ASSESSMENT:
+"""
+_RECOMMENDATION_LABEL = "\n\n### STRATEGIC RECOMMENDATION:\n"
+_DESIGN_LABEL = "\n\n### TECHNICAL DESIGN:\n"
+_GOVERNANCE_LABEL = "\n\n### GOVERNANCE & RISK:\n"
+
+# Upstream sections compressed to fit the synthesizer's context budget
+CONTEXT_SUMMARY_SYSTEM_PROMPT = (
+    "You compress sections of consulting documents. Return only the shortened "
+    "text as markdown, with no preamble."
+)
+# Share of the context budget given to each of the four upstream sections
+SECTION_BUDGET_FRACTION = 0.25
+
 class BlueprintSynthesizerAgent(BaseAgent):
     """
     Agent for synthesizing the final Proposal Statement of Work (SOW).
@@ -34,10 +66,15 @@ class BlueprintSynthesizerAgent(BaseAgent):
     and produces a polished, executive-ready SOW in markdown format.
     """
     
+    STATIC_USER_PREFIX = _STATIC_HEADER
+    
     def __init__(
         self,
         model: str = "llama-3.1-8b-instant",
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        context_tokens: int = 6000,
+        summary_model: str = "llama-3.1-8b-instant",
+        **kwargs: Any
     ):
         """
         Initialize the Blueprint Synthesizer Agent.
@@ -45,56 +82,184 @@ class BlueprintSynthesizerAgent(BaseAgent):
         Args:
             model: LLM model to use
             temperature: Sampling temperature
+            context_tokens: Token budget for the four upstream sections combined
+            summary_model: Model used to summarize sections over budget
+            **kwargs: Forwarded to BaseAgent (e.g. llm_service, cache)
         """
         super().__init__(
             system_prompt=BLUEPRINT_SYNTHESIZER_SYSTEM_PROMPT,
             model=model,
-            temperature=temperature
+            temperature=temperature,
+            **kwargs
+        )
+        self.summary_model = summary_model
+        self.budgeter = ContextBudgeter(
+            max_tokens=context_tokens,
+            summarize=self._summarize,
+            asummarize=self._asummarize
         )
 
-    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _summary_request(text: str, max_tokens: int) -> str:
+        """Build the user message asking to shorten a section."""
+        return (
+            f"Shorten the following text to at most {max_tokens} tokens, "
+            f"preserving all named entities and numbers.\n\n{text}"
+        )
+
+    def _summary_cache_key(self, user_message: str) -> Optional[str]:
         """
-        Process the blueprint synthesis request.
+        Exact-match cache key for a summary request, or None without an exact cache.
+        
+        Summaries are never looked up semantically: a near-identical request
+        may be for a different section or target length.
+        """
+        if self.exact_cache is None:
+            return None
+        
+        payload = orjson.dumps(
+            {
+                "model": self.summary_model,
+                "temperature": 0.0,
+                "system": CONTEXT_SUMMARY_SYSTEM_PROMPT,
+                "user": user_message,
+            },
+            option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.sha256(payload).hexdigest()
+
+    def _summarize(self, text: str, max_tokens: int) -> str:
+        """
+        Summarize a section with the summary model, memoized in the exact cache.
+        
+        Args:
+            text: Prose to shorten
+            max_tokens: Target length in tokens
+        
+        Returns:
+            The shortened text
+        """
+        user_message = self._summary_request(text, max_tokens)
+        key = self._summary_cache_key(user_message)
+        if key is not None:
+            summary = self.exact_cache.get(key)
+            if summary is not None:
+                return summary
+        
+        summary = self.llm_service.generate_response(
+            user_message=user_message,
+            system_message=CONTEXT_SUMMARY_SYSTEM_PROMPT,
+            model=self.summary_model,
+            temperature=0.0,
+            max_tokens=max_tokens
+        )
+        
+        if key is not None:
+            self.exact_cache.set(key, summary)
+        return summary
+
+    async def _asummarize(self, text: str, max_tokens: int) -> str:
+        """Async variant of _summarize, routed through the worker pool when set."""
+        user_message = self._summary_request(text, max_tokens)
+        key = self._summary_cache_key(user_message)
+        if key is not None:
+            summary = await asyncio.to_thread(self.exact_cache.get, key)
+            if summary is not None:
+                return summary
+        
+        generate = (
+            self.worker_pool.agenerate_response if self.worker_pool is not None
+            else self.llm_service.agenerate_response
+        )
+        summary = await generate(
+            user_message=user_message,
+            system_message=CONTEXT_SUMMARY_SYSTEM_PROMPT,
+            model=self.summary_model,
+            temperature=0.0,
+            max_tokens=max_tokens
+        )
+        
+        if key is not None:
+            await asyncio.to_thread(self.exact_cache.set, key, summary)
+        return summary
+
+    @staticmethod
+    def _sections(input_data: Dict[str, Any]) -> List[str]:
+        """
+        Extract the upstream sections for the blueprint synthesis request.
         
         Expected input_data (Aggregated from all previous agents):
         - Orchestrated: {"understand": {...}, "discover": {...}, "architect": {...}, "govern": {...}}
         
         Returns:
-            Dictionary containing the 'content' as markdown text (the final SOW).
+            The understanding, discovery, architecture and governance content.
         """
-        # Support both direct input and orchestrated input
-        understanding = input_data.get("understand", {}).get("content", "N/A")
-        discovery = input_data.get("discover", {}).get("content", "N/A")
-        architecture = input_data.get("architect", {}).get("content", "N/A")
-        governance = input_data.get("govern", {}).get("content", "N/A")
+        return [
+            input_data.get(name, {}).get("content", "N/A")
+            for name in ("understand", "discover", "architect", "govern")
+        ]
 
-        # Build user message for synthesis
-        user_message = f"""
-        Synthesize the following sections into a final Proposal Statement of Work (SOW) for a GenAI Implementation.
+    @staticmethod
+    def _join_sections(sections: List[str]) -> str:
+        """
+        Build the user message from the (budgeted) upstream sections.
         
-        ### Formatting Instructions:
-        1. Use **bold** for emphasis.
-        2. Use # for main headers and ## for subheaders.
-        3. Use bullet points for lists.
-        4. Ensure logical flow and a professional consulting tone.
-        5. DO NOT use other markdown features like tables or code blocks unless absolutely necessary for the Mermaid diagram.
-
-        ### CURRENT STATE ASSESSMENT:
-        {understanding}
+        Returns:
+            The user message for the LLM.
+        """
+        understanding, discovery, architecture, governance = sections
+        user_message = "".join([
+            _STATIC_HEADER, understanding,
+            _RECOMMENDATION_LABEL, discovery,
+            _DESIGN_LABEL, architecture,
+            _GOVERNANCE_LABEL, governance,
+        ])
+        
+        return user_message
 
-        ### STRATEGIC RECOMMENDATION:
-        {discovery}
+    def _build_user_message(self, input_data: Dict[str, Any]) -> str:
+        """
+        Build the user message, fitting each section into its token budget.
+        
+        Returns:
+            The user message for the LLM.
+        """
+        return self._join_sections([
+            self.budgeter.fit(section, budget_fraction=SECTION_BUDGET_FRACTION)
+            for section in self._sections(input_data)
+        ])
 
-        ### TECHNICAL DESIGN:
-        {architecture}
+    async def _abuild_user_message(self, input_data: Dict[str, Any]) -> str:
+        """
+        Async variant of _build_user_message; sections are fitted concurrently.
+        
+        Returns:
+            The user message for the LLM.
+        """
+        sections = await asyncio.gather(*(
+            self.budgeter.afit(section, budget_fraction=SECTION_BUDGET_FRACTION)
+            for section in self._sections(input_data)
+        ))
+        return self._join_sections(list(sections))
 
-        ### GOVERNANCE & RISK:
-        {governance}
+    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process the blueprint synthesis request.
+        
+        Returns:
+            Dictionary containing the 'content' as markdown text (the final SOW).
+        """
+        response = self._call_llm(self._build_user_message(input_data))
         
-        Produce the final synthesized Proposal SOW.
+        return {"content": response}
+
+    async def _aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
+        Async variant of _process.
         
-        # Call LLM
-        response = self._call_llm(user_message)
+        Returns:
+            Dictionary containing the 'content' as markdown text (the final SOW).
+        """
+        response = await self._acall_llm(await self._abuild_user_message(input_data))
         
         return {"content": response}
@@ -1,11 +1,18 @@
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import hashlib
 import logging
+import threading
+import numpy as np
 from app.agents.base_agent import BaseAgent
 from app.services.vectorstores import FAISSVectorStore
 from app.services.embeddings import EmbeddingService
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_QUERY = "What are the business goals, systems, data assets, and constraints mentioned in this document?"
+
 DOCUMENT_UNDERSTANDING_SYSTEM_PROMPT = """
 You are a Senior Enterprise GenAI Consultant. Your goal is to extract and summarize critical business and technical information from the provided document context to lay the foundation for a Generative AI initiative.
 
@@ -24,6 +31,14 @@ You are a Senior Enterprise GenAI Consultant. Your goal is to extract and summar
 Provide a clear, professional markdown summary. Use headers: "GenAI Readiness & Current State Assessment". Include a specific subsection for "Available Baseline Metrics & KPIs" if found. This output will be the foundational section of a Statement of Work (SOW).
 """
 
+# Static scaffolding of the user message. Dynamic content is appended last so
+# repeated calls share the longest possible prompt prefix (provider prefix caching).
+_STATIC_HEADER = (
+    "Based on the document context below, provide a comprehensive Current State "
+    "Assessment for the Statement of Work.\n\n"
+    "DOCUMENT CONTEXT:\n\n"
+)
+
 class DocumentUnderstandingAgent(BaseAgent):
     """
     Agent for extracting business architecture information from documents.
@@ -33,12 +48,19 @@ class DocumentUnderstandingAgent(BaseAgent):
     markdown format.
     """
     
+    STATIC_USER_PREFIX = _STATIC_HEADER
+    
+    # Maximum entries in the query embedding and search result caches
+    EMBEDDING_CACHE_SIZE = 256
+    SEARCH_CACHE_SIZE = 64
+    
     def __init__(
         self,
         vector_store: FAISSVectorStore,
         embedding_service: EmbeddingService,
         model: str = "llama-3.1-8b-instant",
-        temperature: float = 0.1  # Low temperature for extraction accuracy
+        temperature: float = 0.1,  # Low temperature for extraction accuracy
+        **kwargs: Any
     ):
         """
         Initialize the Document Understanding Agent.
@@ -48,33 +70,150 @@ class DocumentUnderstandingAgent(BaseAgent):
             embedding_service: Service for generating query embeddings
             model: LLM model to use
             temperature: Sampling temperature
+            **kwargs: Forwarded to BaseAgent (e.g. llm_service, cache)
         """
         super().__init__(
             system_prompt=DOCUMENT_UNDERSTANDING_SYSTEM_PROMPT,
             model=model,
-            temperature=temperature
+            temperature=temperature,
+            **kwargs
         )
         self.vector_store = vector_store
         self.embedding_service = embedding_service
+        # (query, embedding model) -> float32 embedding bytes
+        self._embedding_cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        # (queries hash, k, vector store version) -> ranked search results
+        self._search_cache: "OrderedDict[Tuple[bytes, int, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._warmed = False
+        
+        # Warm up in the background when constructed inside a running loop;
+        # otherwise the app calls aprewarm() at startup.
+        self._prewarm_task: Optional[asyncio.Task] = None
+        try:
+            self._prewarm_task = asyncio.get_running_loop().create_task(self.aprewarm())
+        except RuntimeError:
+            pass
 
-    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _prewarm(self) -> None:
         """
-        Process the document understanding request.
+        Issue a warm-up embedding and search before the first real request.
+        
+        Embeds the default query, which also seeds the embedding cache, and
+        runs a k=1 search so the FAISS index is paged in. Failures are logged
+        and ignored; the first request simply pays the cold-start cost.
+        """
+        if self._warmed:
+            return
+        try:
+            query_embeddings = self._embed_queries([DEFAULT_QUERY])
+            if not self.vector_store.is_empty():
+                self.vector_store.similarity_search_batch(query_embeddings, k=1)
+            self._warmed = True
+            logger.info("Pre-warm complete", extra={"agent": type(self).__name__})
+        except Exception as e:
+            logger.warning(
+                "Pre-warm failed: %s", e, exc_info=True,
+                extra={"agent": type(self).__name__, "err_type": type(e).__name__}
+            )
+
+    async def aprewarm(self) -> None:
+        """Run _prewarm in a worker thread without blocking the event loop."""
+        await asyncio.to_thread(self._prewarm)
+
+    def _embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        Embed queries, reusing cached embeddings and batching the misses.
+        
+        Args:
+            queries: Query strings
+        
+        Returns:
+            One float32 embedding per query, in order
+        """
+        model = self.embedding_service.model
+        cached: Dict[str, bytes] = {}
+        with self._cache_lock:
+            for query in queries:
+                key = (query, model)
+                if key in self._embedding_cache:
+                    self._embedding_cache.move_to_end(key)
+                    cached[query] = self._embedding_cache[key]
+        
+        missing = [query for query in dict.fromkeys(queries) if query not in cached]
+        if missing:
+            embeddings = self.embedding_service.generate_embeddings(missing)
+            with self._cache_lock:
+                for query, embedding in zip(missing, embeddings):
+                    cached[query] = embedding.tobytes()
+                    self._embedding_cache[(query, model)] = cached[query]
+                while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+        
+        return [np.frombuffer(cached[query], dtype=np.float32) for query in queries]
+
+    def _search(self, queries: List[str], k: int) -> List[Dict[str, Any]]:
+        """
+        Retrieve the top-k chunks across all queries.
+        
+        Results are cached until the vector store changes.
+        
+        Args:
+            queries: Query strings
+            k: Number of chunks to return
+        
+        Returns:
+            Search results ranked by score, deduplicated by chunk
+        """
+        key = (
+            hashlib.blake2b("\x00".join(queries).encode("utf-8"), digest_size=16).digest(),
+            k,
+            self.vector_store.version,
+        )
+        with self._cache_lock:
+            if key in self._search_cache:
+                self._search_cache.move_to_end(key)
+                return self._search_cache[key]
+        
+        # One embedding request and one FAISS search for all queries,
+        # deduplicated by chunk and keeping the best score
+        query_embeddings = self._embed_queries(queries)
+        best: Dict[str, Dict[str, Any]] = {}
+        for query_results in self.vector_store.similarity_search_batch(query_embeddings, k=k):
+            for res in query_results:
+                chunk_id = res["document_id"]
+                if chunk_id not in best or res["score"] > best[chunk_id]["score"]:
+                    best[chunk_id] = res
+        results = sorted(best.values(), key=lambda res: res["score"], reverse=True)[:k]
+        
+        with self._cache_lock:
+            self._search_cache[key] = results
+            while len(self._search_cache) > self.SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        
+        return results
+
+    def _retrieve_context(self, input_data: Dict[str, Any]) -> str:
+        """
+        Retrieve and format the document chunks relevant to the request.
         
         Expected input_data:
         - "query": The focus of the extraction (default: "business architecture")
+        - "queries": Optional list of sub-queries, retrieved in one batch
         - "k": Number of chunks to retrieve (default: 5)
         
         Returns:
-            Dictionary containing the 'content' as markdown text.
+            The formatted context, or an empty string if nothing was found.
         """
-        query = input_data.get("query", "What are the business goals, systems, data assets, and constraints mentioned in this document?")
+        queries = input_data.get("queries") or [input_data.get("query", DEFAULT_QUERY)]
         k = input_data.get("k", 5)
         
         # 1. Retrieve relevant chunks
-        logger.info(f"Retrieving {k} chunks for query: {query}")
-        query_embedding = self.embedding_service.generate_embeddings([query])[0]
-        results = self.vector_store.similarity_search(query_embedding, k=k)
+        logger.info(
+            "Retrieving %s chunks for %d queries: %s", k, len(queries), queries,
+            extra={"agent": type(self).__name__}
+        )
+        results = self._search(queries, k)
         
         # 2. Format context from chunks
         context_parts = []
@@ -82,18 +221,53 @@ class DocumentUnderstandingAgent(BaseAgent):
             text = res["metadata"].get("text", "")
             context_parts.append(f"--- Context Chunk {i+1} ---\n{text}")
         
-        context = "\n\n".join(context_parts)
+        return "\n\n".join(context_parts)
+
+    @staticmethod
+    def _no_context_output() -> Dict[str, Any]:
+        """Output returned when retrieval finds no usable context."""
+        return {
+            "content": "No relevant context found in the uploaded documents to perform a business architecture assessment.",
+            "warning": "No relevant context found in vector store."
+        }
+
+    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process the document understanding request.
+        
+        Expected input_data:
+        - "query": The focus of the extraction (default: "business architecture")
+        - "queries": Optional list of sub-queries, retrieved in one batch
+        - "k": Number of chunks to retrieve (default: 5)
+        
+        Returns:
+            Dictionary containing the 'content' as markdown text.
+        """
+        context = self._retrieve_context(input_data)
         
         if not context:
-            return {
-                "content": "No relevant context found in the uploaded documents to perform a business architecture assessment.",
-                "warning": "No relevant context found in vector store."
-            }
+            return self._no_context_output()
+        
+        # 3. Build the prompt and call the LLM
+        response = self._call_llm(_STATIC_HEADER + context)
+        
+        return {"content": response}
+
+    async def _aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of _process.
+        
+        Retrieval uses blocking embedding and FAISS calls, so it runs in a
+        worker thread; the LLM call is awaited on the event loop.
         
-        # 3. Build the prompt for the LLM
-        user_message = f"DOCUMENT CONTEXT:\n\n{context}\n\nBased on the above context, provide a comprehensive Current State Assessment for the Statement of Work."
+        Returns:
+            Dictionary containing the 'content' as markdown text.
+        """
+        context = await asyncio.to_thread(self._retrieve_context, input_data)
+        
+        if not context:
+            return self._no_context_output()
         
-        # 4. Call LLM
-        response = self._call_llm(user_message)
+        response = await self._acall_llm(_STATIC_HEADER + context)
         
         return {"content": response}
@@ -20,6 +20,15 @@ You are a Senior GenAI Governance & Risk Officer. Your responsibility is to audi
 - OUTPUT FORMAT: Provide a professional markdown section titled "GenAI Governance, Safety, and Risk Compliance Audit".
 """
 
+# Static scaffolding of the user message; dynamic content is appended last
+# so repeated calls share the longest possible prompt prefix.
+_STATIC_HEADER = (
+    "Perform a strict governance audit for the Statement of Work. Validate the "
+    "architecture below and provide a risk assessment.\n\n"
+    "### CURRENT STATE ASSESSMENT & CONSTRAINTS:\n"
+)
+_ARCHITECTURE_LABEL = "\n\n### PROPOSED SOLUTION ARCHITECTURE:\n"
+
 class GovernanceAgent(BaseAgent):
     """
     Agent for validating solution architectures against regulatory and business constraints.
@@ -29,10 +38,13 @@ class GovernanceAgent(BaseAgent):
     audit in markdown format.
     """
     
+    STATIC_USER_PREFIX = _STATIC_HEADER
+    
     def __init__(
         self,
         model: str = "llama-3.1-8b-instant",
-        temperature: float = 0.0  # Zero temperature for strictness
+        temperature: float = 0.0,  # Zero temperature for strictness
+        **kwargs: Any
     ):
         """
         Initialize the Governance Agent.
@@ -40,23 +52,25 @@ class GovernanceAgent(BaseAgent):
         Args:
             model: LLM model to use
             temperature: Sampling temperature
+            **kwargs: Forwarded to BaseAgent (e.g. llm_service, cache)
         """
         super().__init__(
             system_prompt=GOVERNANCE_SYSTEM_PROMPT,
             model=model,
-            temperature=temperature
+            temperature=temperature,
+            **kwargs
         )
 
-    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_user_message(self, input_data: Dict[str, Any]) -> str:
         """
-        Process the governance validation request.
+        Build the user message for the governance validation request.
         
         Expected input_data:
         - Direct: {"understand": {...}, "architect": {...}}
         - Orchestrated: {"understand": {...}, "architect": {...}}
         
         Returns:
-            Dictionary containing the 'content' as markdown text.
+            The user message for the LLM.
         """
         # Support both direct input and orchestrated input
         current_state_data = input_data.get("understand", {})
@@ -66,17 +80,31 @@ class GovernanceAgent(BaseAgent):
         architecture = architecture_data.get("content", "No solution architecture provided.")
 
         # Build user message for audit
-        user_message = f"""
-        ### CURRENT STATE ASSESSMENT & CONSTRAINTS:
-        {current_state}
+        user_message = "".join([
+            _STATIC_HEADER, current_state,
+            _ARCHITECTURE_LABEL, architecture,
+        ])
+        
+        return user_message
+
+    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process the governance validation request.
         
-        ### PROPOSED SOLUTION ARCHITECTURE:
-        {architecture}
+        Returns:
+            Dictionary containing the 'content' as markdown text.
+        """
+        response = self._call_llm(self._build_user_message(input_data))
         
-        Perform a strict governance audit for the Statement of Work. Validate the architecture and provide a risk assessment.
+        return {"content": response}
+
+    async def _aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
+        Async variant of _process.
         
-        # Call LLM
-        response = self._call_llm(user_message)
+        Returns:
+            Dictionary containing the 'content' as markdown text.
+        """
+        response = await self._acall_llm(self._build_user_message(input_data))
         
         return {"content": response}
@@ -1,12 +1,32 @@
 from typing import List, Dict, Any, Optional, Callable
 from enum import Enum
+from functools import partial
+from types import MappingProxyType
+import asyncio
 import logging
-import time
+import random
+from openai import RateLimitError
 from app.agents.base_agent import BaseAgent
+from app.services.llm import GroqService
 
 
 logger = logging.getLogger(__name__)
 
+# Structured-log identity for orchestrator records (see JSONFormatter)
+_LOG_AGENT = "Orchestrator"
+
+
+async def _gather_all(*aws: Any) -> List[Any]:
+    """asyncio.gather that cancels the remaining awaitables when one fails."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
 
 class ExecutionState(Enum):
     """Execution state for orchestrator steps."""
@@ -25,8 +45,11 @@ class OrchestratorStep:
         name: Unique name for this step
         agent: The agent to execute
         retries: Number of retry attempts (default: 0)
-        retry_delay: Delay in seconds between retries (default: 1.0)
+        retry_delay: Base delay in seconds before the first retry, doubled on each further retry (default: 1.0)
         on_failure: Optional callback function for failure handling
+        depends_on: Names of the steps whose outputs this step consumes.
+            None (default) means every previously declared step, which
+            preserves the original sequential semantics.
     """
     
     def __init__(
@@ -35,48 +58,176 @@ class OrchestratorStep:
         agent: BaseAgent,
         retries: int = 0,
         retry_delay: float = 1.0,
-        on_failure: Optional[Callable[[Dict[str, Any], Exception], Dict[str, Any]]] = None
+        on_failure: Optional[Callable[[Dict[str, Any], Exception], Dict[str, Any]]] = None,
+        depends_on: Optional[List[str]] = None
     ):
         self.name = name
         self.agent = agent
         self.retries = retries
         self.retry_delay = retry_delay
         self.on_failure = on_failure
+        self.depends_on = depends_on
 
 
 class Orchestrator:
     """
-    Orchestrator for executing agents sequentially in a defined flow.
+    Orchestrator for executing agents as a dependency graph.
     
     Manages the blueprint generation flow by:
-    - Executing agents in sequence
+    - Validating the dependency graph and grouping steps into ranks
+    - Starting each step as soon as its dependencies have completed,
+      so independent steps run concurrently
     - Passing structured output between agents
     - Handling retries and failure states
     - Tracking execution state
     
     Attributes:
         steps: List of orchestrator steps to execute
+        ranks: Steps grouped by dependency depth (rank 0 has no dependencies)
         execution_log: Log of execution results for each step
+        capture_inputs: Whether step logs keep a view of each step's input
+        capture_outputs: Whether step logs keep each step's full output
     """
     
-    def __init__(self, steps: List[OrchestratorStep]):
+    # Length of string values kept in step-log output previews
+    OUTPUT_PREVIEW_CHARS = 200
+    # Upper bound on the exponential retry backoff, in seconds
+    MAX_RETRY_DELAY = 30.0
+    
+    def __init__(
+        self,
+        steps: List[OrchestratorStep],
+        capture_inputs: bool = False,
+        capture_outputs: bool = False
+    ):
         """
         Initialize the orchestrator with a list of steps.
         
         Args:
             steps: List of OrchestratorStep instances defining the flow
+            capture_inputs: Keep a read-only view of each step's input in the
+                execution log (default: False, only input keys are logged)
+            capture_outputs: Keep each step's full output in the execution log
+                (default: False, a truncated preview is logged)
         """
         if not steps:
             raise ValueError("Orchestrator must have at least one step")
         
         self.steps = steps
+        self.capture_inputs = capture_inputs
+        self.capture_outputs = capture_outputs
+        self._compiled: Optional[Callable[[Dict[str, Any]], Any]] = None
+        self.dependencies = self._resolve_dependencies(steps)
+        self.ranks = self._build_ranks(steps, self.dependencies)
         self.execution_log: List[Dict[str, Any]] = []
     
-    def _execute_step(
+    @staticmethod
+    def _resolve_dependencies(steps: List[OrchestratorStep]) -> Dict[str, List[str]]:
+        """
+        Resolve the dependency list of every step.
+        
+        Args:
+            steps: The orchestrator steps in declaration order
+        
+        Returns:
+            Mapping of step name to the names of the steps it depends on
+        
+        Raises:
+            ValueError: If step names are duplicated or a dependency is unknown
+        """
+        names = [step.name for step in steps]
+        if len(set(names)) != len(names):
+            raise ValueError("Orchestrator step names must be unique")
+        
+        dependencies: Dict[str, List[str]] = {}
+        for i, step in enumerate(steps):
+            if step.depends_on is None:
+                dependencies[step.name] = names[:i]
+                continue
+            
+            for dep in step.depends_on:
+                if dep not in names:
+                    raise ValueError(f"Step '{step.name}' depends on unknown step '{dep}'")
+            dependencies[step.name] = list(step.depends_on)
+        
+        return dependencies
+    
+    @staticmethod
+    def _build_ranks(
+        steps: List[OrchestratorStep],
+        dependencies: Dict[str, List[str]]
+    ) -> List[List[OrchestratorStep]]:
+        """
+        Topologically sort steps and group them into ranks.
+        
+        A step's rank is one more than the highest rank of its dependencies,
+        so every step in a rank only needs outputs from earlier ranks.
+        
+        Args:
+            steps: The orchestrator steps in declaration order
+            dependencies: Resolved dependency names per step
+        
+        Returns:
+            List of ranks, each a list of steps in declaration order
+        
+        Raises:
+            ValueError: If the dependencies contain a cycle
+        """
+        rank_of: Dict[str, int] = {}
+        remaining = list(steps)
+        
+        while remaining:
+            ready = [
+                step for step in remaining
+                if all(dep in rank_of for dep in dependencies[step.name])
+            ]
+            if not ready:
+                cycle = ", ".join(step.name for step in remaining)
+                raise ValueError(f"Cyclic dependencies between steps: {cycle}")
+            
+            for step in ready:
+                rank_of[step.name] = max(
+                    (rank_of[dep] + 1 for dep in dependencies[step.name]),
+                    default=0
+                )
+            remaining = [step for step in remaining if step.name not in rank_of]
+        
+        ranks: List[List[OrchestratorStep]] = [[] for _ in range(max(rank_of.values()) + 1)]
+        for step in steps:
+            ranks[rank_of[step.name]].append(step)
+        
+        return ranks
+    
+    @classmethod
+    def _retry_delay(cls, step: OrchestratorStep, attempt: int, error: Exception) -> float:
+        """
+        Compute the backoff before retrying a failed step.
+        
+        Rate-limit errors honour the server's Retry-After header when present;
+        otherwise the delay grows exponentially from step.retry_delay. Jitter
+        of up to half the delay keeps concurrent retries from synchronizing.
+        
+        Args:
+            step: The step being retried
+            attempt: Number of the attempt that just failed (0-indexed)
+            error: The exception raised by that attempt
+        
+        Returns:
+            Delay in seconds
+        """
+        delay = min(step.retry_delay * (2 ** attempt), cls.MAX_RETRY_DELAY)
+        if isinstance(error, RateLimitError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                pass
+        return delay + random.uniform(0, delay / 2)
+    
+    async def _aexecute_step(
         self,
         step: OrchestratorStep,
-        input_data: Dict[str, Any],
-        attempt: int = 0
+        input_data: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
         Execute a single step with retry logic.
@@ -84,7 +235,6 @@ class Orchestrator:
         Args:
             step: The orchestrator step to execute
             input_data: Input data for the step
-            attempt: Current attempt number (0-indexed)
         
         Returns:
             Output data from the step
@@ -92,48 +242,154 @@ class Orchestrator:
         Raises:
             Exception: If step fails after all retries
         """
-        if attempt > 0:
-            logger.info(f"[Orchestrator] Retrying step '{step.name}' (attempt {attempt + 1})")
-        else:
-            logger.info(f"[Orchestrator] Executing step '{step.name}'")
+        logger.info("Executing step %r", step.name, extra={"agent": _LOG_AGENT, "step": step.name})
         
-        try:
-            output = step.agent.execute(input_data)
-            logger.info(f"[Orchestrator] Step '{step.name}' completed successfully")
-            return output
-        except Exception as e:
-            logger.warning(f"[Orchestrator] Step '{step.name}' failed: {str(e)}")
+        for attempt in range(step.retries + 1):
+            try:
+                output = await step.agent.aexecute(input_data)
+                logger.info(
+                    "Step %r completed successfully", step.name,
+                    extra={"agent": _LOG_AGENT, "step": step.name}
+                )
+                return output
+            except Exception as e:
+                logger.warning(
+                    "Step %r failed: %s", step.name, e,
+                    extra={"agent": _LOG_AGENT, "step": step.name, "err_type": type(e).__name__}
+                )
+                error = e
             
-            # Check if we should retry
             if attempt < step.retries:
+                delay = self._retry_delay(step, attempt, error)
                 logger.info(
-                    f"[Orchestrator] Retrying step '{step.name}' "
-                    f"(attempt {attempt + 1}/{step.retries})"
+                    "Retrying step %r in %.2fs (attempt %d/%d)",
+                    step.name, delay, attempt + 2, step.retries + 1,
+                    extra={"agent": _LOG_AGENT, "step": step.name}
                 )
-                time.sleep(step.retry_delay)
-                return self._execute_step(step, input_data, attempt + 1)
+                await asyncio.sleep(delay)
+        
+        # All retries exhausted - handle failure
+        if step.on_failure:
+            try:
+                logger.info(
+                    "Executing failure handler for %r", step.name,
+                    extra={"agent": _LOG_AGENT, "step": step.name}
+                )
+                return step.on_failure(input_data, error)
+            except Exception as handler_error:
+                logger.exception(
+                    "failure_handler_error",
+                    extra={
+                        "agent": _LOG_AGENT,
+                        "step": step.name,
+                        "err_type": type(handler_error).__name__,
+                    }
+                )
+                raise handler_error from error
+        
+        # No failure handler - raise the exception
+        raise error
+    
+    @classmethod
+    def _preview(cls, output: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a step-log preview of an output, truncating long strings.
+        
+        Args:
+            output: Output data from a step
+        
+        Returns:
+            Dictionary with the same keys and truncated string values
+        """
+        return {
+            key: value[:cls.OUTPUT_PREVIEW_CHARS] if isinstance(value, str) else value
+            for key, value in output.items()
+        }
+    
+    def _view_for(
+        self,
+        step: OrchestratorStep,
+        initial_input: Dict[str, Any],
+        cumulative_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Build the input of a step: the initial input plus its dependencies' outputs.
+        
+        Args:
+            step: The step about to run
+            initial_input: Initial input data of the flow
+            cumulative_data: Results of all completed steps
+        
+        Returns:
+            Input data dictionary for the step
+        """
+        view = initial_input.copy()
+        for dep in self.dependencies[step.name]:
+            view[dep] = cumulative_data[dep]
+        return view
+    
+    async def _arun_step(
+        self,
+        step: OrchestratorStep,
+        input_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Run a step and record its execution log entry.
+        
+        Args:
+            step: The step to run
+            input_data: Input data for the step
+        
+        Returns:
+            Output data from the step
+        
+        Raises:
+            Exception: If the step fails and cannot be recovered
+        """
+        step_log = {
+            "step_name": step.name,
+            "step_index": self.steps.index(step),
+            "state": ExecutionState.PENDING.value,
+            "input_keys": list(input_data),
+            "output": None,
+            "error": None,
+            "attempts": 0
+        }
+        if self.capture_inputs:
+            # The per-step input dict is never mutated after it is built,
+            # so a read-only proxy is a snapshot without copying
+            step_log["input"] = MappingProxyType(input_data)
+        self.execution_log.append(step_log)
+        
+        try:
+            # Execute step
+            step_log["state"] = ExecutionState.RUNNING.value
+            output = await self._aexecute_step(step, input_data)
+            
+            # Success
+            step_log["state"] = ExecutionState.SUCCESS.value
+            step_log["output"] = output if self.capture_outputs else self._preview(output)
+            return output
             
-            # All retries exhausted - handle failure
-            if step.on_failure:
-                try:
-                    logger.info(f"[Orchestrator] Executing failure handler for '{step.name}'")
-                    return step.on_failure(input_data, e)
-                except Exception as handler_error:
-                    logger.error(
-                        f"[Orchestrator] Failure handler for '{step.name}' "
-                        f"raised error: {str(handler_error)}"
-                    )
-                    raise handler_error from e
+        except Exception as e:
+            # Failure
+            step_log["state"] = ExecutionState.FAILED.value
+            step_log["error"] = str(e)
             
-            # No failure handler - raise the exception
+            # The traceback was already logged by the failing agent
+            logger.error(
+                "Flow failed at step %r: %s", step.name, e,
+                extra={"agent": _LOG_AGENT, "step": step.name, "err_type": type(e).__name__}
+            )
             raise
     
-    def execute(self, initial_input: Dict[str, Any]) -> Dict[str, Any]:
+    async def aexecute(self, initial_input: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute the complete orchestrator flow.
         
-        Executes all steps sequentially. Each step receives the cumulative
-        results of all previous steps as input.
+        Each step starts as soon as all of its dependencies have completed,
+        so independent steps run concurrently; each receives the initial
+        input plus the outputs of the steps it depends on.
         
         Args:
             initial_input: Initial input data for the first step
@@ -144,51 +400,119 @@ class Orchestrator:
         Raises:
             Exception: If any step fails and cannot be recovered
         """
-        logger.info(f"[Orchestrator] Starting execution with {len(self.steps)} steps")
+        logger.info(
+            "Starting execution with %d steps in %d ranks", len(self.steps), len(self.ranks),
+            extra={"agent": _LOG_AGENT}
+        )
         self.execution_log = []
         
+        if self._compiled is not None:
+            cumulative_data = await self._compiled(initial_input)
+            logger.info("Flow completed successfully", extra={"agent": _LOG_AGENT})
+            return cumulative_data
+        
         # Cumulative state: starts with initial input
         cumulative_data = initial_input.copy()
         
-        for i, step in enumerate(self.steps):
-            step_log = {
-                "step_name": step.name,
-                "step_index": i,
-                "state": ExecutionState.PENDING.value,
-                "input": cumulative_data.copy(),
-                "output": None,
-                "error": None,
-                "attempts": 0
-            }
-            
-            try:
-                # Execute step
-                step_log["state"] = ExecutionState.RUNNING.value
-                output = self._execute_step(step, cumulative_data)
-                
-                # Success - Add step output to cumulative data
-                step_log["state"] = ExecutionState.SUCCESS.value
-                step_log["output"] = output
-                
-                # We store step results under their step name to avoid collisions
-                cumulative_data[step.name] = output
-                
-            except Exception as e:
-                # Failure
-                step_log["state"] = ExecutionState.FAILED.value
-                step_log["error"] = str(e)
-                self.execution_log.append(step_log)
+        pending = list(self.steps)
+        running: Dict["asyncio.Task[Dict[str, Any]]", OrchestratorStep] = {}
+        completed: Dict[str, Dict[str, Any]] = {}
+        
+        try:
+            while pending or running:
+                for step in list(pending):
+                    if all(dep in completed for dep in self.dependencies[step.name]):
+                        input_data = self._view_for(step, initial_input, completed)
+                        task = asyncio.create_task(self._arun_step(step, input_data))
+                        running[task] = step
+                        pending.remove(step)
                 
-                logger.error(
-                    f"[Orchestrator] Flow failed at step '{step.name}': {str(e)}"
+                # The graph is acyclic, so something is always running here
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step = running.pop(task)
+                    completed[step.name] = task.result()
+        except BaseException:
+            # Stop everything still in flight
+            in_flight = list(running)
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            raise
+        
+        # We store step results under their step name to avoid collisions
+        for step in self.steps:
+            cumulative_data[step.name] = completed[step.name]
+        
+        logger.info("Flow completed successfully", extra={"agent": _LOG_AGENT})
+        return cumulative_data
+    
+    def compile(self) -> Callable[[Dict[str, Any]], Any]:
+        """
+        Specialize the flow into generated straight-line async code.
+        
+        Emits one coroutine function for this exact graph: each rank becomes
+        a single gather over its steps, and step inputs are dict literals
+        naming exactly their dependencies. Steps run through _arun_step, so
+        retries, failure handlers and the per-step execution log entries are
+        the same as on the interpreted path.
+        After compiling, aexecute runs the generated function.
+        
+        Returns:
+            The compiled coroutine function, taking the initial input
+        """
+        var_of = {step.name: f"_s{i}" for i, step in enumerate(self.steps)}
+        namespace: Dict[str, Any] = {"_gather_all": _gather_all}
+        lines = ["async def _compiled(initial_input):"]
+        
+        for rank in self.ranks:
+            calls = []
+            for step in rank:
+                runner = f"_run{var_of[step.name][2:]}"
+                namespace[runner] = partial(self._arun_step, step)
+                deps = "".join(
+                    f"{dep!r}: {var_of[dep]}, " for dep in self.dependencies[step.name]
                 )
-                raise
+                calls.append(f"{runner}({{**initial_input, {deps}}})")
             
+            targets = ", ".join(var_of[step.name] for step in rank)
+            if len(rank) == 1:
+                lines.append(f"    {targets} = await {calls[0]}")
+            else:
+                lines.append(f"    {targets}, = await _gather_all({', '.join(calls)})")
+        
+        results = "".join(f"{step.name!r}: {var_of[step.name]}, " for step in self.steps)
+        lines.append(f"    return {{**initial_input, {results}}}")
+        
+        source = "\n".join(lines)
+        logger.debug("Compiled flow:\n%s", source, extra={"agent": _LOG_AGENT})
+        exec(compile(source, "<orchestrator-compiled>", "exec"), namespace)
+        
+        self._compiled = namespace["_compiled"]
+        return self._compiled
+    
+    def execute(self, initial_input: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Synchronous wrapper around aexecute for callers without an event loop.
+        
+        The event loop's async LLM client is closed before the loop is.
+        
+        Args:
+            initial_input: Initial input data for the first step
+        
+        Returns:
+            Cumulative dictionary containing results from all steps
+        
+        Raises:
+            Exception: If any step fails and cannot be recovered
+        """
+        async def run() -> Dict[str, Any]:
+            try:
+                return await self.aexecute(initial_input)
             finally:
-                self.execution_log.append(step_log)
+                await GroqService.aclose()
         
-        logger.info("[Orchestrator] Flow completed successfully")
-        return cumulative_data
+        return asyncio.run(run())
     
     def get_execution_log(self) -> List[Dict[str, Any]]:
         """
@@ -21,6 +21,15 @@ You are a Lead GenAI Solution Architect. Your task is to design a robust, scalab
 - OUTPUT FORMAT: Provide a professional markdown section titled "GenAI Technical Architecture and Implementation Design".
 """
 
+# Static scaffolding of the user message; dynamic content is appended last
+# so repeated calls share the longest possible prompt prefix.
+_STATIC_HEADER = (
+    "Design a complete enterprise AI solution architecture for the Statement of Work "
+    "based on the information below.\n\n"
+    "### CURRENT STATE ASSESSMENT:\n"
+)
+_RECOMMENDATION_LABEL = "\n\n### STRATEGIC RECOMMENDATION:\n"
+
 class SolutionArchitectureAgent(BaseAgent):
     """
     Agent for designing enterprise AI solution architectures.
@@ -30,10 +39,13 @@ class SolutionArchitectureAgent(BaseAgent):
     deployment strategies, and technical diagrams in markdown format.
     """
     
+    STATIC_USER_PREFIX = _STATIC_HEADER
+    
     def __init__(
         self,
         model: str = "llama-3.1-8b-instant",
-        temperature: float = 0.2
+        temperature: float = 0.2,
+        **kwargs: Any
     ):
         """
         Initialize the Solution Architecture Agent.
@@ -41,23 +53,25 @@ class SolutionArchitectureAgent(BaseAgent):
         Args:
             model: LLM model to use
             temperature: Sampling temperature
+            **kwargs: Forwarded to BaseAgent (e.g. llm_service, cache)
         """
         super().__init__(
             system_prompt=SOLUTION_ARCHITECTURE_SYSTEM_PROMPT,
             model=model,
-            temperature=temperature
+            temperature=temperature,
+            **kwargs
         )
 
-    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_user_message(self, input_data: Dict[str, Any]) -> str:
         """
-        Process the solution architecture request.
+        Build the user message for the solution architecture request.
         
         Expected input_data:
         - Direct: {"understand": {"content": "..."}, "discover": {"content": "..."}}
         - Orchestrated: {"understand": {...}, "discover": {...}}
         
         Returns:
-            Dictionary containing the 'content' as markdown text.
+            The user message for the LLM.
         """
         # Support both direct input and orchestrated input
         current_state_data = input_data.get("understand", {})
@@ -67,17 +81,31 @@ class SolutionArchitectureAgent(BaseAgent):
         recommendation = recommendation_data.get("content", "No strategic recommendation provided.")
 
         # Build user message
-        user_message = f"""
-        ### CURRENT STATE ASSESSMENT:
-        {current_state}
+        user_message = "".join([
+            _STATIC_HEADER, current_state,
+            _RECOMMENDATION_LABEL, recommendation,
+        ])
+        
+        return user_message
+
+    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process the solution architecture request.
         
-        ### STRATEGIC RECOMMENDATION:
-        {recommendation}
+        Returns:
+            Dictionary containing the 'content' as markdown text.
+        """
+        response = self._call_llm(self._build_user_message(input_data))
         
-        Design a complete enterprise AI solution architecture based on this information for the Statement of Work.
+        return {"content": response}
+
+    async def _aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
+        Async variant of _process.
         
-        # Call LLM
-        response = self._call_llm(user_message)
+        Returns:
+            Dictionary containing the 'content' as markdown text.
+        """
+        response = await self._acall_llm(self._build_user_message(input_data))
         
         return {"content": response}
@@ -20,6 +20,14 @@ You are a Senior Strategic GenAI Architect. Your objective is to identify, prior
 - OUTPUT FORMAT: Provide a professional markdown section titled "GenAI Strategic Roadmap and Recommended Initiative". Include a dedicated table or section for "KPIs and R&D Success Metrics".
 """
 
+# Static scaffolding of the user message; dynamic content is appended last
+# so repeated calls share the longest possible prompt prefix.
+_STATIC_HEADER = (
+    "Based on the assessment below, propose several AI use cases and provide a final "
+    "strategic recommendation for the Statement of Work.\n\n"
+    "### CURRENT STATE ASSESSMENT:\n"
+)
+
 class UseCaseDiscoveryAgent(BaseAgent):
     """
     Agent for discovering and prioritizing AI use cases.
@@ -29,10 +37,13 @@ class UseCaseDiscoveryAgent(BaseAgent):
     in a professional markdown format.
     """
     
+    STATIC_USER_PREFIX = _STATIC_HEADER
+    
     def __init__(
         self,
         model: str = "llama-3.1-8b-instant",
-        temperature: float = 0.2  # Low temperature for analytical consistency
+        temperature: float = 0.2,  # Low temperature for analytical consistency
+        **kwargs: Any
     ):
         """
         Initialize the Use Case Discovery Agent.
@@ -40,37 +51,53 @@ class UseCaseDiscoveryAgent(BaseAgent):
         Args:
             model: LLM model to use
             temperature: Sampling temperature
+            **kwargs: Forwarded to BaseAgent (e.g. llm_service, cache)
         """
         super().__init__(
             system_prompt=USE_CASE_DISCOVERY_SYSTEM_PROMPT,
             model=model,
-            temperature=temperature
+            temperature=temperature,
+            **kwargs
         )
 
-    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_user_message(self, input_data: Dict[str, Any]) -> str:
         """
-        Process the use case discovery request.
+        Build the user message for the use case discovery request.
         
         Expected input_data:
         - Direct: {"content": "..."}
         - Orchestrated: {"understand": {"content": "..."}}
         
         Returns:
-            Dictionary containing the 'content' as markdown text.
+            The user message for the LLM.
         """
         # Support both direct input and orchestrated input
         context_data = input_data.get("understand", input_data)
         current_state = context_data.get("content", "No current state assessment provided.")
 
         # Build user message
-        user_message = f"""
-        ### CURRENT STATE ASSESSMENT:
-        {current_state}
+        user_message = _STATIC_HEADER + current_state
         
-        Based on this assessment, propose several AI use cases and provide a final strategic recommendation for the Statement of Work.
+        return user_message
+
+    def _process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
+        Process the use case discovery request.
         
-        # Call LLM
-        response = self._call_llm(user_message)
+        Returns:
+            Dictionary containing the 'content' as markdown text.
+        """
+        response = self._call_llm(self._build_user_message(input_data))
+        
+        return {"content": response}
+
+    async def _aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of _process.
+        
+        Returns:
+            Dictionary containing the 'content' as markdown text.
+        """
+        response = await self._acall_llm(self._build_user_message(input_data))
         
         return {"content": response}
@@ -1,108 +1,199 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from uuid import UUID
 from pathlib import Path
+from typing import Any, Dict, Optional, Set
 import logging
 import asyncio
 import os
-from app.core.services import blueprint_orchestrator, ingestion_pipeline
-from app.utils.pdf_generator import generate_blueprint_pdf
+from app.core.services import (
+    blueprint_orchestrator,
+    ingestion_pipeline,
+    vector_store,
+    INGEST_POOL,
+    PDF_POOL
+)
+from app.utils.pdf_generator import write_blueprint_pdf
+from app.api.v1.routes.upload import lookup_upload
 
 router = APIRouter(tags=["blueprint"])
 
 logger = logging.getLogger(__name__)
 
-# Directory where uploaded files are stored
-UPLOAD_DIR = Path("data/uploads")
 # Directory where generated blueprints are stored
 BLUEPRINT_DIR = Path("data/blueprints")
 BLUEPRINT_DIR.mkdir(parents=True, exist_ok=True)
 
-@router.post("/generate-blueprint/{document_id}")
-async def generate_blueprint(document_id: UUID):
+# Maximum blueprint pipelines running at once; further requests wait
+MAX_CONCURRENT_BLUEPRINTS = 4
+# Upper bound in seconds for one request's ingestion + orchestration + PDF
+BLUEPRINT_TIMEOUT = 600.0
+_blueprint_slots = asyncio.Semaphore(MAX_CONCURRENT_BLUEPRINTS)
+
+# In-memory state of pending, running and failed generation jobs, keyed by
+# document ID. Completed jobs are dropped; their PDF on disk is the record.
+_jobs: Dict[str, Dict[str, Any]] = {}
+
+# Content hashes of documents already in the vector store; each chunk
+# records its document's hash, so the set survives restarts with the store
+_ingested_hashes: Set[str] = {
+    meta["content_sha256"] for meta in vector_store.metadata if meta.get("content_sha256")
+}
+
+
+async def _run_pipeline(
+    document_id: UUID,
+    file_path: Path,
+    content_type: str,
+    content_hash: Optional[str]
+) -> Path:
+    """
+    Ingest a document, run the agent flow and render the blueprint PDF.
+    
+    Ingestion runs on INGEST_POOL, orchestration on the event loop (its
+    blocking work on LLM_POOL) and PDF rendering on PDF_POOL, so concurrent
+    requests overlap their stages without competing for threads.
+    Ingestion is skipped when a document with identical content has
+    already been ingested.
+    
+    Returns:
+        Path of the saved blueprint PDF
     """
-    Invokes the orchestrator to generate an AI blueprint from an uploaded document
-    and returns the final PDF file directly.
+    loop = asyncio.get_running_loop()
+    
+    # Step 1: Ingestion
+    if content_hash is not None and content_hash in _ingested_hashes:
+        logger.info(f"Skipping ingestion for {document_id}: content already ingested")
+    else:
+        logger.info(f"Starting ingestion for {document_id}")
+        await loop.run_in_executor(
+            INGEST_POOL,
+            ingestion_pipeline.ingest_document,
+            document_id,
+            file_path,
+            content_type,
+            {"content_sha256": content_hash} if content_hash is not None else None
+        )
+        if content_hash is not None:
+            _ingested_hashes.add(content_hash)
+    
+    # Step 2: Orchestration
+    logger.info(f"Starting orchestration for {document_id}")
+    initial_input = {
+        "query": "Generate a comprehensive GenAI Statement of Work (SOW) based on this document.",
+        "k": 5
+    }
+    
+    final_result = await blueprint_orchestrator.aexecute(initial_input)
+    
+    # The final blueprint is the output of the 'synthesize' step
+    blueprint_data = final_result.get("synthesize", final_result)
+    
+    # Step 3: PDF Generation, written to disk by the worker process so the
+    # bytes are never pickled back to this process
+    logger.info(f"Generating PDF for {document_id}")
+    blueprint_path = BLUEPRINT_DIR / f"{document_id}.pdf"
+    await loop.run_in_executor(
+        PDF_POOL,
+        write_blueprint_pdf,
+        blueprint_data,
+        blueprint_path
+    )
+    
+    logger.info(f"Blueprint generation complete for {document_id}")
+    return blueprint_path
+
+
+async def _run_blueprint_job(
+    document_id: UUID,
+    file_path: Path,
+    content_type: str,
+    content_hash: Optional[str]
+) -> None:
+    """
+    Background task that runs the pipeline and records the job's outcome.
+    """
+    job = _jobs[str(document_id)]
+    try:
+        async with _blueprint_slots:
+            job["status"] = "running"
+            await asyncio.wait_for(
+                _run_pipeline(document_id, file_path, content_type, content_hash),
+                timeout=BLUEPRINT_TIMEOUT
+            )
+        _jobs.pop(str(document_id), None)
+    except asyncio.TimeoutError:
+        logger.error(f"Blueprint generation for {document_id} timed out")
+        job.update(status="failed", error="Generation timed out")
+    except Exception as e:
+        logger.exception(f"Error generating blueprint for {document_id}")
+        job.update(status="failed", error=f"Generation failed: {str(e)}")
+
+
+@router.post("/generate-blueprint/{document_id}", status_code=202)
+async def generate_blueprint(document_id: UUID, background_tasks: BackgroundTasks):
     """
+    Starts generating an AI blueprint from an uploaded document.
+    
+    Generation runs in the background: the response carries the job status
+    immediately (202 while pending or running, 200 once the PDF exists).
+    Poll GET /blueprint/{document_id}/status and download the PDF from
+    GET /blueprint/{document_id} when it is completed.
+    """
+    task_id = str(document_id)
     
     # Check if blueprint already exists
     blueprint_path = BLUEPRINT_DIR / f"{document_id}.pdf"
     if blueprint_path.exists():
-        logger.info(f"Returning existing blueprint for {document_id}")
-        return FileResponse(
-            path=blueprint_path,
-            media_type="application/pdf",
-            filename=f"{document_id}.pdf"
-        )
+        logger.info(f"Blueprint already exists for {document_id}")
+        return JSONResponse(status_code=200, content={"status": "completed", "task_id": task_id})
     
-    # 1. Find the uploaded file
-    file_path = None
-    content_type = "application/pdf" # Default assumption
-    
-    if not UPLOAD_DIR.exists():
-        raise HTTPException(status_code=404, detail="Upload directory not found")
-        
-    for file in UPLOAD_DIR.iterdir():
-        if file.name.startswith(str(document_id)):
-            file_path = file
-            if file.suffix.lower() == ".txt":
-                content_type = "text/plain"
-            break
-            
-    if not file_path:
+    # Don't start a second run for a document that is already being processed
+    job = _jobs.get(task_id)
+    if job is not None and job["status"] in ("pending", "running"):
+        return {"status": job["status"], "task_id": task_id}
+    
+    upload = lookup_upload(document_id)
+    if upload is None:
         raise HTTPException(status_code=404, detail=f"Document with ID {document_id} not found")
+    file_path, content_type, content_hash = upload
+    
+    _jobs[task_id] = {"status": "pending", "error": None}
+    background_tasks.add_task(
+        _run_blueprint_job, document_id, file_path, content_type, content_hash
+    )
+    
+    return {"status": "pending", "task_id": task_id}
+
+
+@router.get("/blueprint/{document_id}/status")
+async def get_blueprint_status(document_id: UUID):
+    """
+    Returns the status of a blueprint generation job:
+    pending, running, completed or failed (with an error message).
+    """
+    task_id = str(document_id)
+    job = _jobs.get(task_id)
+    if job is not None:
+        return {"status": job["status"], "task_id": task_id, "error": job["error"]}
+    
+    if (BLUEPRINT_DIR / f"{document_id}.pdf").exists():
+        return {"status": "completed", "task_id": task_id, "error": None}
+    
+    raise HTTPException(status_code=404, detail=f"No blueprint job for document {document_id}")
 
-    try:
-        # Step 1: Ingestion
-        logger.info(f"Starting ingestion for {document_id}")
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None, 
-            ingestion_pipeline.ingest_document, 
-            document_id, 
-            file_path, 
-            content_type
-        )
-        
-        # Step 2: Orchestration
-        logger.info(f"Starting orchestration for {document_id}")
-        initial_input = {
-            "query": "Generate a comprehensive GenAI Statement of Work (SOW) based on this document.",
-            "k": 5
-        }
-        
-        final_result = await loop.run_in_executor(
-            None,
-            blueprint_orchestrator.execute,
-            initial_input
-        )
-        
-        # The final blueprint is the output of the 'synthesize' step
-        blueprint_data = final_result.get("synthesize", final_result)
-        
-        # Step 3: PDF Generation
-        logger.info(f"Generating PDF for {document_id}")
-        pdf_bytes = await loop.run_in_executor(
-            None,
-            generate_blueprint_pdf,
-            blueprint_data
-        )
-        
-        # Save PDF to disk
-        blueprint_path = BLUEPRINT_DIR / f"{document_id}.pdf"
-        with open(blueprint_path, "wb") as f:
-            f.write(pdf_bytes)
-        
-        logger.info(f"Blueprint generation complete for {document_id}")
-        
-        # Return the file directly
-        return FileResponse(
-            path=blueprint_path,
-            media_type="application/pdf",
-            filename=f"{document_id}.pdf"
-        )
-            
-    except Exception as e:
-        logger.error(f"Error generating blueprint for {document_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
 
+@router.get("/blueprint/{document_id}")
+async def download_blueprint(document_id: UUID):
+    """
+    Returns the generated blueprint PDF.
+    """
+    blueprint_path = BLUEPRINT_DIR / f"{document_id}.pdf"
+    if not blueprint_path.exists():
+        raise HTTPException(status_code=404, detail=f"Blueprint for document {document_id} is not available")
+    
+    return FileResponse(
+        path=blueprint_path,
+        media_type="application/pdf",
+        filename=f"{document_id}.pdf"
+    )
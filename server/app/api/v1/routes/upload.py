@@ -1,8 +1,11 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from uuid import uuid4
+from uuid import UUID, uuid4
 from pathlib import Path
-import aiofiles
-from typing import Annotated
+from typing import Annotated, BinaryIO, Optional, Tuple
+import asyncio
+import hashlib
+import orjson
+from app.core.services import UPLOAD_INDEX
 
 router = APIRouter(tags=["upload"])
 
@@ -19,6 +22,97 @@ ALLOWED_CONTENT_TYPES = {
     "application/msword",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
 }
+COPY_BUFFER_SIZE = 64 * 1024  # 64 KB
+# Suffix of the sidecar file recording an upload's name, content type and hash
+SIDECAR_SUFFIX = ".json"
+
+
+class _FileTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_FILE_SIZE while being copied."""
+
+
+def _save_upload(source: BinaryIO, file_path: Path) -> Tuple[int, str]:
+    """
+    Stream an upload to disk through a fixed-size buffer, hashing it on the way.
+    
+    Runs in a worker thread. The partial file is removed if the upload
+    turns out to be too large or the copy fails.
+    
+    Args:
+        source: The uploaded file object
+        file_path: Destination path
+    
+    Returns:
+        Number of bytes written and the SHA-256 hex digest of the content
+    
+    Raises:
+        _FileTooLargeError: If more than MAX_FILE_SIZE bytes are read
+        OSError: If the file cannot be written
+    """
+    total = 0
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, "wb") as dest:
+            while chunk := source.read(COPY_BUFFER_SIZE):
+                total += len(chunk)
+                if total > MAX_FILE_SIZE:
+                    raise _FileTooLargeError()
+                digest.update(chunk)
+                dest.write(chunk)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+    return total, digest.hexdigest()
+
+
+def _write_sidecar(
+    document_id: UUID,
+    file_path: Path,
+    content_type: str,
+    content_hash: str
+) -> None:
+    """Record an upload in its JSON sidecar and in UPLOAD_INDEX."""
+    sidecar = {
+        "filename": file_path.name,
+        "content_type": content_type,
+        "sha256": content_hash,
+    }
+    (UPLOAD_DIR / f"{document_id}{SIDECAR_SUFFIX}").write_bytes(orjson.dumps(sidecar))
+    UPLOAD_INDEX[document_id] = (file_path, content_type, content_hash)
+
+
+def lookup_upload(document_id: UUID) -> Optional[Tuple[Path, str, Optional[str]]]:
+    """
+    Locate an uploaded document.
+    
+    Checks UPLOAD_INDEX first, then the upload's JSON sidecar (e.g. after a
+    restart). Uploads saved before sidecars existed are found by globbing
+    for their file name, with the content type inferred from the suffix.
+    
+    Args:
+        document_id: The document ID returned by the upload
+    
+    Returns:
+        The file path, content type and SHA-256 content hash (None for
+        uploads without a sidecar), or None if no upload matches
+    """
+    entry = UPLOAD_INDEX.get(document_id)
+    if entry is not None:
+        return entry
+    
+    try:
+        sidecar = orjson.loads((UPLOAD_DIR / f"{document_id}{SIDECAR_SUFFIX}").read_bytes())
+        entry = (UPLOAD_DIR / sidecar["filename"], sidecar["content_type"], sidecar["sha256"])
+    except FileNotFoundError:
+        for file in UPLOAD_DIR.glob(f"{document_id}*"):
+            if file.suffix != SIDECAR_SUFFIX:
+                content_type = "text/plain" if file.suffix.lower() == ".txt" else "application/pdf"
+                entry = (file, content_type, None)
+                break
+    
+    if entry is not None:
+        UPLOAD_INDEX[document_id] = entry
+    return entry
 
 
 @router.post("")
@@ -41,22 +135,6 @@ async def upload_file(
         HTTPException: If file validation fails (size or content type)
         HTTPException: If file save operation fails
     """
-    # Validate file size
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File size ({file_size} bytes) exceeds maximum allowed size ({MAX_FILE_SIZE} bytes)"
-        )
-    
-    if file_size == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="File is empty"
-        )
-    
     # Validate content type
     if file.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(
@@ -64,6 +142,13 @@ async def upload_file(
             detail=f"Content type '{file.content_type}' is not supported. Allowed types: {', '.join(ALLOWED_CONTENT_TYPES)}"
         )
     
+    # Reject oversized files up front when the client declared a size
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size ({file.size} bytes) exceeds maximum allowed size ({MAX_FILE_SIZE} bytes)"
+        )
+    
     # Generate document ID
     document_id = uuid4()
     
@@ -73,14 +158,31 @@ async def upload_file(
     file_path = UPLOAD_DIR / saved_filename
     
     try:
-        # Save file asynchronously
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(file_content)
+        # Stream to disk in a worker thread, enforcing the size limit as we go
+        file_size, content_hash = await asyncio.to_thread(_save_upload, file.file, file_path)
+    except _FileTooLargeError:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size exceeds maximum allowed size ({MAX_FILE_SIZE} bytes)"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to save file: {str(e)}"
         )
     
+    if file_size == 0:
+        file_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=400,
+            detail="File is empty"
+        )
+    
+    # Index the upload; the content hash lets identical documents be
+    # ingested only once
+    await asyncio.to_thread(
+        _write_sidecar, document_id, file_path, file.content_type, content_hash
+    )
+    
     return {"document_id": str(document_id)}
 
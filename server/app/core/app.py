@@ -1,7 +1,20 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import api_router
+from app.core.config import settings
+from app.core.logging_config import configure_logging
+from app.core.services import (
+    understanding_agent,
+    INGEST_POOL,
+    LLM_POOL,
+    PDF_POOL,
+    SHARED_HTTP,
+    llm_service
+)
+
 
+configure_logging(settings.log_level)
 
 app = FastAPI(
     title="BlueprintX API",
@@ -20,3 +33,30 @@ app.add_middleware(
 
 app.include_router(api_router)
 
+
+@app.on_event("startup")
+async def install_default_executor() -> None:
+    """Run asyncio.to_thread work on LLM_POOL instead of the shared default pool."""
+    asyncio.get_running_loop().set_default_executor(LLM_POOL)
+
+
+@app.on_event("startup")
+async def prewarm_agents() -> None:
+    """Warm the embedding client and FAISS index without delaying startup."""
+    app.state.prewarm_task = asyncio.create_task(understanding_agent.aprewarm())
+
+
+@app.on_event("shutdown")
+async def close_llm_clients() -> None:
+    """Close the serving loop's async Groq client and its connection pool."""
+    await llm_service.aclose()
+
+
+@app.on_event("shutdown")
+def shutdown_executors() -> None:
+    """Stop the request-stage worker pools and close pooled API connections."""
+    INGEST_POOL.shutdown(wait=False, cancel_futures=True)
+    LLM_POOL.shutdown(wait=False, cancel_futures=True)
+    PDF_POOL.shutdown(wait=False, cancel_futures=True)
+    SHARED_HTTP.close()
+
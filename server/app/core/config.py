@@ -14,6 +14,8 @@ class Settings(BaseSettings):
         groq_api_key: API key for Groq LLM service
         env: Environment name (development, staging, production)
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        deterministic_agents: Run discovery, architecture and governance at
+            temperature 0 so their responses are served from the exact cache
     """
     
     groq_api_key: str
@@ -22,6 +24,8 @@ class Settings(BaseSettings):
     
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
     
+    deterministic_agents: bool = False
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,54 @@
+import logging
+from typing import Any, Dict
+import orjson
+
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_STANDARD_RECORD_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Log formatter that renders each record as one orjson-encoded JSON line.
+    
+    Structured values passed via `extra` (e.g. extra={"payload": data}) are
+    emitted as JSON fields instead of being pre-serialized into the message,
+    so they are only encoded when a handler actually writes the record.
+    The "agent" field defaults to the logger name; callers identify the
+    emitting agent or component with extra={"agent": ...} instead of
+    formatting a prefix into the message.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "lvl": record.levelname,
+            "agent": record.name,
+            "msg": record.getMessage(),
+            "ts": record.created,
+        }
+        
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS:
+                entry[key] = value
+        
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        
+        return orjson.dumps(entry, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def configure_logging(level: str = "INFO") -> None:
+    """
+    Route application logs through a single JSON handler on the root logger.
+    
+    Args:
+        level: Root log level name (e.g. "INFO")
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter())
+    
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
@@ -1,6 +1,7 @@
 from app.services.vectorstores import FAISSVectorStore
 from app.services.embeddings import EmbeddingService
-from app.services.llm import GroqService
+from app.services.llm import GroqService, LLMWorkerPool
+from app.services.cache import SemanticLLMCache
 from app.agents import (
     DocumentUnderstandingAgent,
     UseCaseDiscoveryAgent,
@@ -11,26 +12,129 @@ from app.agents import (
     OrchestratorStep
 )
 from app.services.ingestion import IngestionPipeline
-from typing import List
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import httpx
+import multiprocessing
+import os
+from app.core.config import settings
+from diskcache import Cache
 
 
+# Separate executors per blocking request stage, so a burst in one stage
+# cannot starve the others of threads:
+# - INGEST_POOL: extraction, chunking, embedding and blueprint file I/O
+# - LLM_POOL: installed as the event loop's default executor at startup, so
+#   asyncio.to_thread calls (agent, cache and LLM work) run here
+# - PDF_POOL: CPU-bound PDF rendering in worker processes, started from a
+#   forkserver (spawn where unavailable, e.g. Windows): forking this process
+#   once it runs pool threads, HTTP clients and SQLite handles can deadlock
+#   a child on a lock held at fork time
+INGEST_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ingest")
+LLM_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm")
+PDF_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+PDF_POOL = ProcessPoolExecutor(
+    max_workers=os.cpu_count(),
+    mp_context=multiprocessing.get_context(PDF_START_METHOD)
+)
+
+# Uploaded documents by ID: (file path, content type, SHA-256 of the content).
+# Filled by the upload route and backed by a JSON sidecar next to each upload
+# so lookups survive restarts without scanning the upload directory.
+UPLOAD_INDEX: Dict[UUID, Tuple[Path, str, Optional[str]]] = {}
+
+# One keep-alive HTTP/2 connection pool for all sync OpenAI/Groq traffic, so
+# concurrent agent and embedding requests reuse connections instead of
+# paying a TCP+TLS handshake each
+SHARED_HTTP = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, keepalive_expiry=60),
+    timeout=60.0
+)
+
 # Initialize shared services
-embedding_service = EmbeddingService(model="text-embedding-3-small")
-vector_store = FAISSVectorStore(dimension=embedding_service.get_dimension())
+embedding_service = EmbeddingService.instance(
+    model="text-embedding-3-small",
+    cache_dir="data/embedding_cache",
+    http_client=SHARED_HTTP
+)
+# Document chunks are stored 8-bit scalar-quantized in 256 inverted lists,
+# about a quarter of the float32 footprint; searches are exact (fp16) until
+# 39 chunks per list (9984) have been added and the index is trained on
+# them, so small corpora never pay the IVF recall cost. The store is
+# written through to disk and memory-mapped back in on restart.
+# BLUEPRINT_FAISS_INDEX overrides the index for new stores, e.g.
+# "IVF1024,PQ16" (product quantization, 16 bytes per vector) for corpora
+# of hundreds of thousands of chunks.
+VECTOR_STORE_DIR = Path("data/vector_store")
+DOCUMENT_INDEX_TYPE = os.environ.get("BLUEPRINT_FAISS_INDEX", "IVF256,SQ8")
+try:
+    vector_store = FAISSVectorStore.load(VECTOR_STORE_DIR)
+except FileNotFoundError:
+    vector_store = FAISSVectorStore(
+        dimension=embedding_service.get_dimension(),
+        index_type=DOCUMENT_INDEX_TYPE,
+        persist_dir=VECTOR_STORE_DIR
+    )
 ingestion_pipeline = IngestionPipeline(
     vector_store=vector_store,
     embedding_service=embedding_service
 )
+# Shared LLM response cache (separate index from the document store)
+llm_cache = SemanticLLMCache(
+    embedding_service=embedding_service,
+    persist_dir="data/semantic_cache"
+)
+# One Groq client shared by every agent
+llm_service = GroqService(http_client=SHARED_HTTP)
+# All async agent LLM calls go through one bounded pool of Groq workers
+llm_pool = LLMWorkerPool(llm_service=llm_service, workers=8)
+# Exact-match cache for temperature-0 agents, persisted across restarts
+llm_exact_cache = Cache("data/llm_cache")
+# With deterministic_agents set, the middle agents run at temperature 0 so
+# repeated documents are answered from llm_exact_cache
+middle_agent_temperature = {"temperature": 0.0} if settings.deterministic_agents else {}
 
 # Initialize Agents
 understanding_agent = DocumentUnderstandingAgent(
     vector_store=vector_store,
-    embedding_service=embedding_service
+    embedding_service=embedding_service,
+    llm_service=llm_service,
+    cache=llm_cache,
+    worker_pool=llm_pool,
+    exact_cache=llm_exact_cache
+)
+discovery_agent = UseCaseDiscoveryAgent(
+    llm_service=llm_service,
+    cache=llm_cache,
+    worker_pool=llm_pool,
+    exact_cache=llm_exact_cache,
+    **middle_agent_temperature
+)
+architecture_agent = SolutionArchitectureAgent(
+    llm_service=llm_service,
+    cache=llm_cache,
+    worker_pool=llm_pool,
+    exact_cache=llm_exact_cache,
+    **middle_agent_temperature
+)
+governance_agent = GovernanceAgent(
+    llm_service=llm_service,
+    cache=llm_cache,
+    worker_pool=llm_pool,
+    exact_cache=llm_exact_cache,
+    **middle_agent_temperature
+)
+synthesizer_agent = BlueprintSynthesizerAgent(
+    llm_service=llm_service,
+    cache=llm_cache,
+    worker_pool=llm_pool,
+    exact_cache=llm_exact_cache
 )
-discovery_agent = UseCaseDiscoveryAgent()
-architecture_agent = SolutionArchitectureAgent()
-governance_agent = GovernanceAgent()
-synthesizer_agent = BlueprintSynthesizerAgent()
 
 # Define Orchestrator Flow
 def create_blueprint_orchestrator() -> Orchestrator:
@@ -38,6 +142,9 @@ def create_blueprint_orchestrator() -> Orchestrator:
     Creates and configures the blueprint generation orchestrator.
     
     The flow is: Understanding -> Discovery -> Architecture -> Governance -> Synthesis
+    
+    Each step declares the upstream outputs it reads, so the orchestrator
+    can run any steps whose dependencies are satisfied concurrently.
     """
     
     # Custom failure handler example
@@ -48,31 +155,41 @@ def create_blueprint_orchestrator() -> Orchestrator:
         OrchestratorStep(
             name="understand",
             agent=understanding_agent,
-            retries=1
+            retries=1,
+            depends_on=[]
         ),
         OrchestratorStep(
             name="discover",
             agent=discovery_agent,
-            retries=1
+            retries=1,
+            depends_on=["understand"]
         ),
         OrchestratorStep(
             name="architect",
             agent=architecture_agent,
-            retries=1
+            retries=1,
+            depends_on=["understand", "discover"]
         ),
         OrchestratorStep(
             name="govern",
             agent=governance_agent,
-            retries=1
+            retries=1,
+            depends_on=["understand", "architect"]
         ),
         OrchestratorStep(
             name="synthesize",
             agent=synthesizer_agent,
-            retries=1
+            retries=1,
+            depends_on=["understand", "discover", "architect", "govern"]
         )
     ]
     
-    return Orchestrator(steps)
+    orchestrator = Orchestrator(steps)
+    if settings.env == "production":
+        # Production runs the codegen'd flow; it records the same per-step
+        # execution log as the interpreted path used elsewhere.
+        orchestrator.compile()
+    return orchestrator
 
 # Global orchestrator instance
 blueprint_orchestrator = create_blueprint_orchestrator()
@@ -0,0 +1,3 @@
+from .semantic_cache import SemanticLLMCache
+
+__all__ = ['SemanticLLMCache']
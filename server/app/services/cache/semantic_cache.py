@@ -0,0 +1,449 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import numpy as np
+import orjson
+from app.services.embeddings import EmbeddingService
+from app.services.vectorstores import FAISSVectorStore
+
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticLLMCache:
+    """
+    Response cache for LLM calls keyed by prompt similarity.
+    
+    Lookups go through two layers:
+    1. An exact-match dictionary keyed by a hash of the full prompt
+    2. A nearest-neighbour search over embeddings of the prompt's dynamic
+       content (the user message after the agent's static prefix),
+       returning the cached response when cosine similarity exceeds the
+       threshold and the content's fingerprint (length bucket and leading
+       text) matches exactly
+    
+    Entries are scoped by agent name, model and temperature; calls with a
+    temperature above MAX_CACHEABLE_TEMPERATURE bypass the cache entirely.
+    At most max_entries entries are kept; beyond that the oldest are
+    evicted and the similarity index is rebuilt from the rest. When
+    persist_dir is set, every entry is also written to
+    <persist_dir>/<sha256 of prompt>.json and reloaded on startup.
+    
+    Cache failures (e.g. the embedding call erroring) never fail the LLM
+    call itself; the response is simply generated and not cached.
+    
+    Attributes:
+        embedding_service: Service used to embed prompts
+        store: FAISS vector store holding prompt embeddings and responses
+        threshold: Minimum cosine similarity for a semantic hit
+        temperature_tolerance: Maximum temperature difference for a hit
+        max_exact_entries: Maximum number of exact-match entries kept
+        max_entries: Maximum number of generated entries kept for semantic
+            lookup and on disk
+        persist_dir: Optional directory entries are persisted to
+    """
+    
+    # Version of the embedded key text; persisted embeddings of another
+    # version are not used for semantic lookups
+    KEY_VERSION = 2
+    # Leading characters of the dynamic content hashed into its fingerprint
+    FINGERPRINT_CHARS = 256
+    # Share of max_entries evicted at once, so the index is not rebuilt on
+    # every insert once the cache is full
+    EVICTION_FRACTION = 0.1
+    # Sampling above this temperature is too random for cached answers to be valid
+    MAX_CACHEABLE_TEMPERATURE = 0.5
+    # Neighbours examined per lookup, so entries of other agents or models
+    # near the query do not hide a matching one
+    SEARCH_K = 4
+    
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        threshold: float = 0.95,
+        temperature_tolerance: float = 0.05,
+        max_exact_entries: int = 1024,
+        max_entries: int = 1024,
+        persist_dir: Optional[Union[str, Path]] = None
+    ):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            embedding_service: Service used to embed prompts
+            threshold: Minimum cosine similarity for a semantic hit (default: 0.95)
+            temperature_tolerance: Maximum temperature difference for a hit (default: 0.05)
+            max_exact_entries: Maximum number of exact-match entries kept (default: 1024)
+            max_entries: Maximum number of generated entries kept for semantic
+                lookup and on disk (default: 1024)
+            persist_dir: Optional directory to persist entries to (default: memory only)
+        """
+        self.embedding_service = embedding_service
+        self.store = FAISSVectorStore(dimension=embedding_service.get_dimension())
+        self.threshold = threshold
+        self.temperature_tolerance = temperature_tolerance
+        self.max_exact_entries = max_exact_entries
+        self.max_entries = max_entries
+        self.persist_dir = Path(persist_dir) if persist_dir is not None else None
+        self._exact: "OrderedDict[str, str]" = OrderedDict()
+        # Generated entries oldest first: exact key -> (embedding, store
+        # metadata), or None when the entry has no usable embedding
+        self._entries: "OrderedDict[str, Optional[Tuple[np.ndarray, Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        if self.persist_dir is not None:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+            self._load()
+    
+    @staticmethod
+    def _exact_key(
+        system_prompt: str,
+        user_message: str,
+        model: str,
+        temperature: float,
+        agent_name: str
+    ) -> str:
+        """SHA-256 of the full prompt, sampling parameters and agent; also the persisted file name."""
+        digest = hashlib.sha256()
+        for part in (agent_name, model, repr(temperature), system_prompt, user_message):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+    
+    def _load(self) -> None:
+        """Rebuild the exact and semantic layers from persisted entries, oldest first."""
+        paths = []
+        for path in self.persist_dir.glob("*.json"):
+            try:
+                paths.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        
+        for _, path in sorted(paths):
+            try:
+                entry = orjson.loads(path.read_bytes())
+            except (OSError, orjson.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable semantic cache entry {path.name}: {str(e)}")
+                continue
+            
+            self._put_exact(path.stem, entry["response"])
+            semantic = None
+            if entry.get("embedding") is not None and entry.get("key_version") == self.KEY_VERSION:
+                semantic = (
+                    np.asarray(entry["embedding"], dtype=np.float32),
+                    self._store_metadata(
+                        entry["agent"], entry["model"], entry["temperature"],
+                        entry["fingerprint"], entry["response"]
+                    ),
+                )
+            self._entries[path.stem] = semantic
+        
+        evicted = self._evict()
+        self._rebuild_store()
+        self._delete_persisted(evicted)
+        logger.info(f"Loaded {len(self._entries)} semantic cache entries from {self.persist_dir}")
+    
+    @staticmethod
+    def _store_metadata(
+        agent_name: str,
+        model: str,
+        temperature: float,
+        fingerprint: str,
+        response: str
+    ) -> Dict[str, Any]:
+        """Metadata stored with an entry's embedding in the similarity index."""
+        return {
+            "agent": agent_name,
+            "model": model,
+            "temperature": temperature,
+            "fingerprint": fingerprint,
+            "response": response,
+        }
+    
+    def _evict(self) -> List[str]:
+        """
+        Drop the oldest entries once more than max_entries are held.
+        
+        Must be called with _lock held (or before the cache is shared).
+        
+        Returns:
+            Keys of the evicted entries
+        """
+        if len(self._entries) <= self.max_entries:
+            return []
+        
+        target = self.max_entries - int(self.max_entries * self.EVICTION_FRACTION)
+        evicted = []
+        while len(self._entries) > target:
+            key, _ = self._entries.popitem(last=False)
+            evicted.append(key)
+        return evicted
+    
+    def _rebuild_store(self) -> None:
+        """
+        Rebuild the similarity index from the entries still held.
+        
+        Must be called with _lock held (or before the cache is shared).
+        """
+        semantic = [entry for entry in self._entries.values() if entry is not None]
+        self.store = FAISSVectorStore(dimension=self.embedding_service.get_dimension())
+        if semantic:
+            self.store.add_documents(
+                np.vstack([embedding for embedding, _ in semantic]),
+                [meta for _, meta in semantic]
+            )
+    
+    def _delete_persisted(self, keys: List[str]) -> None:
+        """Remove the persisted files of evicted entries."""
+        if self.persist_dir is None:
+            return
+        
+        for key in keys:
+            try:
+                (self.persist_dir / f"{key}.json").unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Failed to delete evicted semantic cache entry: {str(e)}")
+    
+    def _persist(
+        self,
+        key: str,
+        agent_name: str,
+        model: str,
+        temperature: float,
+        fingerprint: str,
+        embedding: Optional[np.ndarray],
+        response: str
+    ) -> None:
+        """Write one entry to persist_dir, atomically replacing any previous copy."""
+        if self.persist_dir is None:
+            return
+        
+        entry = {
+            "agent": agent_name,
+            "model": model,
+            "temperature": temperature,
+            "key_version": self.KEY_VERSION,
+            "fingerprint": fingerprint,
+            "embedding": embedding,
+            "response": response,
+        }
+        path = self.persist_dir / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            tmp_path.write_bytes(orjson.dumps(entry, option=orjson.OPT_SERIALIZE_NUMPY))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to persist semantic cache entry: {str(e)}")
+    
+    @staticmethod
+    def _dynamic_text(user_message: str, static_prefix: str) -> str:
+        """
+        The part of the user message that varies between calls.
+        
+        Only this is embedded: the agent's static scaffolding is identical
+        for every input and would pull unrelated prompts together, and the
+        agent itself is matched exactly through the entry metadata.
+        """
+        if static_prefix and user_message.startswith(static_prefix):
+            return user_message[len(static_prefix):]
+        return user_message
+    
+    def _fingerprint(self, dynamic_text: str) -> str:
+        """
+        Cheap fingerprint a semantic hit must match exactly.
+        
+        Combines the power-of-two length bucket with a hash of the
+        whitespace-normalized leading text, so similar-sounding inputs from
+        different documents cannot answer for each other.
+        """
+        leading = " ".join(dynamic_text[:self.FINGERPRINT_CHARS].split())
+        digest = hashlib.blake2b(leading.encode("utf-8"), digest_size=8).hexdigest()
+        return f"{len(dynamic_text).bit_length()}:{digest}"
+    
+    def _get_exact(self, key: str) -> Optional[str]:
+        with self._lock:
+            response = self._exact.get(key)
+            if response is not None:
+                self._exact.move_to_end(key)
+            return response
+    
+    def _put_exact(self, key: str, response: str) -> None:
+        with self._lock:
+            self._exact[key] = response
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_exact_entries:
+                self._exact.popitem(last=False)
+    
+    def _find_similar(
+        self,
+        embedding: np.ndarray,
+        model: str,
+        temperature: float,
+        agent_name: str,
+        fingerprint: str
+    ) -> Optional[str]:
+        """
+        Return the cached response of the nearest matching prompt if it is a hit.
+        
+        The store reports cosine similarity directly.
+        """
+        with self._lock:
+            if self.store.is_empty():
+                return None
+            hits = self.store.similarity_search(embedding, k=self.SEARCH_K)
+        
+        for hit in hits:
+            if hit["similarity"] <= self.threshold:
+                break
+            meta = hit["metadata"]
+            if (
+                meta["agent"] == agent_name
+                and meta["fingerprint"] == fingerprint
+                and meta["model"] == model
+                and abs(temperature - meta["temperature"]) < self.temperature_tolerance
+            ):
+                return meta["response"]
+        return None
+    
+    def _add(
+        self,
+        key: str,
+        embedding: Optional[np.ndarray],
+        model: str,
+        temperature: float,
+        agent_name: str,
+        fingerprint: str,
+        response: str
+    ) -> None:
+        """Store a freshly generated response in every cache layer, evicting the oldest."""
+        self._put_exact(key, response)
+        semantic = None
+        if embedding is not None:
+            semantic = (
+                embedding,
+                self._store_metadata(agent_name, model, temperature, fingerprint, response),
+            )
+        
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = semantic
+            evicted = self._evict()
+            if evicted:
+                self._rebuild_store()
+            elif semantic is not None:
+                self.store.add_documents(semantic[0][np.newaxis, :], [semantic[1]])
+        
+        self._persist(key, agent_name, model, temperature, fingerprint, embedding, response)
+        self._delete_persisted(evicted)
+    
+    def _embed(self, dynamic_text: str) -> Optional[np.ndarray]:
+        try:
+            return self.embedding_service.generate_embeddings([dynamic_text])[0]
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup skipped: {str(e)}")
+            return None
+    
+    def get_or_generate(
+        self,
+        system_prompt: str,
+        user_message: str,
+        model: str,
+        temperature: float,
+        generate: Callable[[], str],
+        agent_name: str = "",
+        static_prefix: str = ""
+    ) -> str:
+        """
+        Return a cached response for the prompt, or generate and cache one.
+        
+        Args:
+            system_prompt: The agent's system prompt
+            user_message: The user message
+            model: The LLM model name
+            temperature: The sampling temperature
+            generate: Callable producing the response on a cache miss
+            agent_name: Name of the calling agent; entries never cross agents
+            static_prefix: Fixed text the agent's user messages start with,
+                left out of semantic matching (default: none)
+        
+        Returns:
+            The cached or freshly generated response
+        """
+        if temperature > self.MAX_CACHEABLE_TEMPERATURE:
+            return generate()
+        
+        exact_key = self._exact_key(system_prompt, user_message, model, temperature, agent_name)
+        response = self._get_exact(exact_key)
+        if response is not None:
+            return response
+        
+        dynamic_text = self._dynamic_text(user_message, static_prefix)
+        fingerprint = self._fingerprint(dynamic_text)
+        embedding = self._embed(dynamic_text)
+        if embedding is not None:
+            response = self._find_similar(embedding, model, temperature, agent_name, fingerprint)
+            if response is not None:
+                self._put_exact(exact_key, response)
+                return response
+        
+        response = generate()
+        self._add(exact_key, embedding, model, temperature, agent_name, fingerprint, response)
+        return response
+    
+    async def aget_or_generate(
+        self,
+        system_prompt: str,
+        user_message: str,
+        model: str,
+        temperature: float,
+        agenerate: Callable[[], Awaitable[str]],
+        agent_name: str = "",
+        static_prefix: str = ""
+    ) -> str:
+        """
+        Async variant of get_or_generate.
+        
+        The blocking embedding, FAISS and disk calls run in a worker thread.
+        
+        Args:
+            system_prompt: The agent's system prompt
+            user_message: The user message
+            model: The LLM model name
+            temperature: The sampling temperature
+            agenerate: Coroutine function producing the response on a cache miss
+            agent_name: Name of the calling agent; entries never cross agents
+            static_prefix: Fixed text the agent's user messages start with,
+                left out of semantic matching (default: none)
+        
+        Returns:
+            The cached or freshly generated response
+        """
+        if temperature > self.MAX_CACHEABLE_TEMPERATURE:
+            return await agenerate()
+        
+        exact_key = self._exact_key(system_prompt, user_message, model, temperature, agent_name)
+        response = self._get_exact(exact_key)
+        if response is not None:
+            return response
+        
+        dynamic_text = self._dynamic_text(user_message, static_prefix)
+        fingerprint = self._fingerprint(dynamic_text)
+        embedding = await asyncio.to_thread(self._embed, dynamic_text)
+        if embedding is not None:
+            response = await asyncio.to_thread(
+                self._find_similar, embedding, model, temperature, agent_name, fingerprint
+            )
+            if response is not None:
+                self._put_exact(exact_key, response)
+                return response
+        
+        response = await agenerate()
+        await asyncio.to_thread(
+            self._add, exact_key, embedding, model, temperature, agent_name, fingerprint, response
+        )
+        return response
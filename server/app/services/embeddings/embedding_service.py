@@ -1,12 +1,36 @@
+from collections import deque
+from diskcache import Cache
 from openai import OpenAI
-from typing import List
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Union
+import hashlib
+import httpx
 import os
+import threading
+import time
+import numpy as np
+import tiktoken
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 
+class _EmbedRequest:
+    """A caller's texts waiting to be embedded as part of a coalesced batch."""
+    
+    __slots__ = ("texts", "result", "error", "lead", "wake")
+    
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+        # Set with wake when the caller should send the next batch itself
+        self.lead = False
+        # Set when the result is ready or the caller has been made leader
+        self.wake = threading.Event()
+
+
 class EmbeddingService:
     """
     Service for generating text embeddings.
@@ -14,10 +38,27 @@ class EmbeddingService:
     This service provides a clean interface for generating embeddings from text.
     Uses OpenAI's embeddings API for generation.
     
+    Small requests from concurrent threads are coalesced: the first caller
+    to find no batch being collected becomes its leader. While another batch
+    is in flight it waits max_wait seconds for more requests, then takes up
+    to max_batch pending texts and hands leadership on before making the API
+    call, so the next batch is collected and sent in parallel. Each caller
+    gets its slice of its batch's result. Use instance() to share one
+    service per model across the process.
+    
+    Each API call is split into sub-batches that respect the provider's
+    per-request token and input limits. With cache_dir set, embeddings are
+    also cached on disk by SHA-256 of the text, so re-ingesting a document
+    only embeds chunks that were never seen before.
+    
     Attributes:
         client: OpenAI client for embedding generation
         model: The embedding model to use
         dimension: The dimension of embeddings produced by the model
+        max_batch: Maximum texts per coalesced API call
+        max_wait: Seconds a batch leader waits for more requests while
+            another batch is in flight
+        cache: Optional on-disk embedding cache keyed by text hash
     """
     
     # Model dimension mapping
@@ -25,12 +66,33 @@ class EmbeddingService:
         "text-embedding-3-small": 1536,
     }
     
-    def __init__(self, model: str = "text-embedding-3-small"):
+    # Per-request limits of the OpenAI embeddings API
+    MAX_BATCH_TOKENS = 300_000
+    MAX_BATCH_INPUTS = 2048
+    
+    _instances: Dict[str, "EmbeddingService"] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+        cache_dir: Optional[Union[str, Path]] = None,
+        http_client: Optional[httpx.Client] = None
+    ):
         """
         Initialize the embedding service.
         
         Args:
             model: The embedding model to use (default: text-embedding-3-small)
+            max_batch: Maximum texts per coalesced API call (default: 64)
+            max_wait: Seconds to wait for requests to coalesce while another
+                batch is in flight; 0 disables coalescing (default: 0.005)
+            cache_dir: Optional directory for the on-disk embedding cache
+                (default: no caching)
+            http_client: Optional httpx.Client so the connection pool can be
+                shared with other API clients (default: the SDK's own)
         
         Raises:
             ValueError: If OPENAI_API_KEY environment variable is not set
@@ -40,19 +102,57 @@ class EmbeddingService:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
         
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, http_client=http_client)
         self.model = model
         self.dimension = self.MODEL_DIMENSIONS.get(model, 1536)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: Deque[_EmbedRequest] = deque()
+        self._pending_lock = threading.Lock()
+        self._leader_active = False
+        self._inflight = 0
+        self.cache = Cache(str(cache_dir)) if cache_dir is not None else None
+        self._encoding: Optional[tiktoken.Encoding] = None
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    @classmethod
+    def instance(cls, model: str = "text-embedding-3-small", **kwargs: Any) -> "EmbeddingService":
+        """
+        Get the process-wide service for a model, creating it on first use.
+        
+        Args:
+            model: The embedding model to use (default: text-embedding-3-small)
+            **kwargs: Constructor options, used only when the instance is created
+        
+        Returns:
+            The shared EmbeddingService for the model
+        """
+        with cls._instances_lock:
+            if model not in cls._instances:
+                cls._instances[model] = cls(model=model, **kwargs)
+            return cls._instances[model]
+    
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        """Tokenizer of the embedding model, loaded on first use."""
+        if self._encoding is None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        return self._encoding
+    
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
         
+        Thread-safe. Requests smaller than max_batch are coalesced with
+        concurrent requests from other threads into one API call.
+        
         Args:
             texts: List of text strings to embed
         
         Returns:
-            List of embedding vectors, each as a list of floats
+            float32 array of shape (len(texts), dimension), one row per text
         
         Raises:
             ValueError: If texts list is empty
@@ -61,15 +161,159 @@ class EmbeddingService:
         if not texts:
             raise ValueError("Cannot generate embeddings for empty text list")
         
+        if len(texts) >= self.max_batch or self.max_wait <= 0:
+            return self._embed(texts)
+        
+        request = _EmbedRequest(texts)
+        with self._pending_lock:
+            self._pending.append(request)
+            lead = not self._leader_active
+            self._leader_active = True
+            # Only wait for company when the service is already busy
+            contended = self._inflight > 0
+        
+        if lead:
+            if contended:
+                time.sleep(self.max_wait)
+            self._send_batch()
+        
+        while True:
+            request.wake.wait()
+            if not request.lead:
+                break
+            # Promoted to lead the batch queued behind the previous one
+            request.lead = False
+            request.wake.clear()
+            self._send_batch()
+        
+        if request.error is not None:
+            raise request.error
+        return request.result
+    
+    def _send_batch(self) -> None:
+        """
+        Send one batch of up to max_batch texts from the head of the queue.
+        
+        Leadership is handed on before the API call: to the next queued
+        request if more are waiting, otherwise to the next caller to arrive.
+        The leader's own request is at the head, so it is always in the batch.
+        """
+        batch: List[_EmbedRequest] = []
+        handed_off = False
+        try:
+            with self._pending_lock:
+                size = 0
+                while self._pending and (
+                    not batch or size + len(self._pending[0].texts) <= self.max_batch
+                ):
+                    batch.append(self._pending.popleft())
+                    size += len(batch[-1].texts)
+                if self._pending:
+                    self._pending[0].lead = True
+                    self._pending[0].wake.set()
+                else:
+                    self._leader_active = False
+                self._inflight += 1
+                handed_off = True
+        finally:
+            if not handed_off:
+                with self._pending_lock:
+                    self._leader_active = False
+        
+        try:
+            embeddings = self._embed([text for req in batch for text in req.texts])
+            offset = 0
+            for req in batch:
+                req.result = embeddings[offset:offset + len(req.texts)]
+                offset += len(req.texts)
+        except Exception as e:
+            for req in batch:
+                req.error = e
+        except BaseException as e:
+            for req in batch:
+                req.error = e
+            raise
+        finally:
+            with self._pending_lock:
+                self._inflight -= 1
+            for req in batch:
+                req.wake.set()
+    
+    def _cache_key(self, text: str) -> str:
+        """SHA-256 of the model and text, used as the embedding cache key."""
+        return hashlib.sha256(f"{self.model}\x00{text}".encode("utf-8")).hexdigest()
+    
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, serving cached vectors and requesting only the misses.
+        
+        Raises:
+            Exception: If embedding generation fails
+        """
+        if self.cache is None:
+            return self._request_batched(texts)
+        
+        keys = [self._cache_key(text) for text in texts]
+        embeddings: List[Optional[np.ndarray]] = []
+        for key in keys:
+            cached = self.cache.get(key)
+            embeddings.append(
+                np.frombuffer(cached, dtype=np.float32) if cached is not None else None
+            )
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            fresh = self._request_batched([texts[i] for i in missing])
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+                self.cache.set(keys[i], embedding.tobytes())
+        
+        return np.vstack(embeddings)
+    
+    def _request_batched(self, texts: List[str]) -> np.ndarray:
+        """
+        Request embeddings in as few API calls as the per-request limits allow.
+        
+        Raises:
+            Exception: If embedding generation fails
+        """
+        if len(texts) == 1:
+            return self._request(texts)
+        
+        embeddings: List[np.ndarray] = []
+        batch: List[str] = []
+        batch_tokens = 0
+        for text, tokens in zip(texts, map(len, self.encoding.encode_ordinary_batch(texts))):
+            if batch and (
+                batch_tokens + tokens > self.MAX_BATCH_TOKENS
+                or len(batch) >= self.MAX_BATCH_INPUTS
+            ):
+                embeddings.append(self._request(batch))
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        embeddings.append(self._request(batch))
+        
+        return embeddings[0] if len(embeddings) == 1 else np.concatenate(embeddings)
+    
+    def _request(self, texts: List[str]) -> np.ndarray:
+        """
+        Call the embeddings API for texts in one request.
+        
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        
+        Raises:
+            Exception: If embedding generation fails
+        """
         try:
             response = self.client.embeddings.create(
                 model=self.model,
                 input=texts
             )
             
-            # Extract embeddings from response
-            embeddings = [item.embedding for item in response.data]
-            return embeddings
+            # Convert the response to one packed float32 array
+            return np.asarray([item.embedding for item in response.data], dtype=np.float32)
         except Exception as e:
             raise Exception(f"Error generating embeddings: {str(e)}") from e
     
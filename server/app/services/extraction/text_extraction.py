@@ -1,5 +1,5 @@
 from pathlib import Path
-import io
+from typing import Iterator
 from pypdf import PdfReader
 
 
@@ -62,32 +62,30 @@ class TextExtractionService:
             raise IOError(f"Error reading file {file_path}: {str(e)}") from e
     
     @staticmethod
-    def _extract_from_pdf(file_content: bytes) -> str:
+    def _iter_pdf_pages(file_path: Path) -> Iterator[str]:
         """
-        Extract text from PDF file content.
+        Extract text from a PDF file one page at a time.
         
-        Extraction logic for PDF format.
+        Extraction logic for PDF format. The reader works on the open file,
+        so only the page being extracted is held in memory rather than the
+        whole document and its joined text.
         
         Args:
-            file_content: PDF file content as bytes
+            file_path: Path to the PDF file
         
-        Returns:
-            Extracted text from the PDF
+        Yields:
+            Extracted text of each page that has any
         
         Raises:
             ValueError: If the PDF cannot be parsed
         """
         try:
-            pdf_file = io.BytesIO(file_content)
-            reader = PdfReader(pdf_file)
-            
-            text_parts = []
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(page_text)
-            
-            return "\n".join(text_parts)
+            with open(file_path, "rb") as pdf_file:
+                reader = PdfReader(pdf_file)
+                for page in reader.pages:
+                    page_text = page.extract_text()
+                    if page_text:
+                        yield page_text
         except Exception as e:
             raise ValueError(f"Error extracting text from PDF: {str(e)}") from e
     
@@ -113,40 +111,63 @@ class TextExtractionService:
             raise ValueError(f"Error decoding text file as UTF-8: {str(e)}") from e
     
     @classmethod
-    def extract_text(cls, file_path: Path, content_type: str) -> str:
+    def iter_text(cls, file_path: Path, content_type: str) -> Iterator[str]:
         """
-        Extract text from a file.
+        Extract text from a file as a stream of pieces.
         
-        This method coordinates file handling and extraction logic.
-        It reads the file and delegates to the appropriate extraction method
-        based on the content type.
+        PDFs yield one piece per page, so callers can process a document
+        without holding all of its text at once; plain text yields the
+        whole file. Joining the pieces with newlines gives extract_text.
         
         Args:
             file_path: Path to the file to extract text from
             content_type: MIME type of the file (e.g., 'application/pdf', 'text/plain')
         
         Returns:
-            Extracted text from the file
+            Iterator over the extracted text pieces
         
         Raises:
             UnsupportedFileFormatError: If the content type is not supported
             FileNotFoundError: If the file does not exist
             IOError: If the file cannot be read
             ValueError: If the file content cannot be parsed or decoded
+                (raised while iterating for PDFs)
         """
         # Validate format
         if content_type not in cls.SUPPORTED_FORMATS:
             raise UnsupportedFileFormatError(content_type)
         
-        # File handling: Read file content
-        file_content = cls._read_file_content(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
         
         # Extraction logic: Extract text based on content type
         if content_type == "application/pdf":
-            return cls._extract_from_pdf(file_content)
+            return cls._iter_pdf_pages(file_path)
         elif content_type == "text/plain":
-            return cls._extract_from_txt(file_content)
+            return iter([cls._extract_from_txt(cls._read_file_content(file_path))])
         else:
             # This should never happen due to validation above, but included for safety
             raise UnsupportedFileFormatError(content_type)
-
+    
+    @classmethod
+    def extract_text(cls, file_path: Path, content_type: str) -> str:
+        """
+        Extract text from a file.
+        
+        This method coordinates file handling and extraction logic
+        by joining the pieces produced by iter_text.
+        
+        Args:
+            file_path: Path to the file to extract text from
+            content_type: MIME type of the file (e.g., 'application/pdf', 'text/plain')
+        
+        Returns:
+            Extracted text from the file
+        
+        Raises:
+            UnsupportedFileFormatError: If the content type is not supported
+            FileNotFoundError: If the file does not exist
+            IOError: If the file cannot be read
+            ValueError: If the file content cannot be parsed or decoded
+        """
+        return "\n".join(cls.iter_text(file_path, content_type))
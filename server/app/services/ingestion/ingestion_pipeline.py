@@ -1,8 +1,8 @@
 from pathlib import Path
 from uuid import UUID
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List
 from app.services.extraction import TextExtractionService
-from app.utils import chunk_text
+from app.utils import chunk_text_stream
 from app.services.embeddings import EmbeddingService
 from app.services.vectorstores import FAISSVectorStore
 
@@ -89,19 +89,27 @@ class IngestionPipeline:
         """
         logger.info(f"Starting ingestion for document {document_id} from {file_path}")
         
-        # Step 1: Extract text
-        extracted_text = self.extraction_service.extract_text(file_path, content_type)
-        text_length = len(extracted_text)
-        logger.info(f"Extracted {text_length} characters of text from {file_path}")
+        # Steps 1-2: Extract text page by page and chunk it as it streams in
+        pieces = self.extraction_service.iter_text(file_path, content_type)
+        text_length = 0
         
-        # Step 2: Chunk text
-        text_chunks = chunk_text(
-            text=extracted_text,
+        def counted(texts: Iterable[str]) -> Iterator[str]:
+            nonlocal text_length
+            for i, text in enumerate(texts):
+                # Count the newline a joined extraction would put between pieces
+                text_length += len(text) + (1 if i else 0)
+                yield text
+        
+        text_chunks: List[str] = list(chunk_text_stream(
+            counted(pieces),
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap
-        )
+        ))
         chunks_created = len(text_chunks)
-        logger.info(f"Created {chunks_created} chunks from extracted text")
+        logger.info(
+            f"Extracted {text_length} characters of text from {file_path} "
+            f"into {chunks_created} chunks"
+        )
         
         if chunks_created == 0:
             logger.warning(f"No chunks created for document {document_id}. Text might be empty.")
@@ -118,16 +126,17 @@ class IngestionPipeline:
         embeddings = self.embedding_service.generate_embeddings(text_chunks)
         embeddings_generated = len(embeddings)
         
-        # Step 4: Prepare metadata for each chunk
+        # Step 4: Prepare metadata for each chunk from a shared template
+        base_metadata = {
+            "document_id": str(document_id),
+            "content_type": content_type,
+            "file_path": str(file_path),
+        }
         metadata_list = []
         for i, chunk_text_content in enumerate(text_chunks):
-            chunk_metadata = {
-                "document_id": str(document_id),
-                "chunk_index": i,
-                "text": chunk_text_content,
-                "content_type": content_type,
-                "file_path": str(file_path),
-            }
+            chunk_metadata = base_metadata.copy()
+            chunk_metadata["chunk_index"] = i
+            chunk_metadata["text"] = chunk_text_content
             if additional_metadata:
                 chunk_metadata.update(additional_metadata)
             metadata_list.append(chunk_metadata)
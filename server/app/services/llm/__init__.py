@@ -1,4 +1,4 @@
 from .groq import GroqService
+from .worker_pool import LLMWorkerPool
 
-__all__ = ['GroqService']
-
+__all__ = ['GroqService', 'LLMWorkerPool']
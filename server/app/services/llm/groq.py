@@ -1,11 +1,62 @@
-from openai import OpenAI
+from collections import OrderedDict
+from openai import OpenAI, AsyncOpenAI
+import asyncio
+import hashlib
+import httpx
+import logging
 import os
+import threading
+import weakref
 from typing import Optional, List, Dict, Any
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+# Per-request timeout in seconds and SDK-level retries (connection errors,
+# 408/429/5xx) applied to every Groq client
+REQUEST_TIMEOUT = 60.0
+MAX_RETRIES = 2
+# Default number of concurrent requests issued by agenerate_batch
+BATCH_CONCURRENCY = 5
+
+# Async clients are bound to the event loop they were created on, so one
+# pooled client is kept per loop and shared by every agent call on it.
+_client_by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+# Sync clients are not loop-bound, so one keep-alive pool serves every
+# GroqService that is not given its own http_client.
+_shared_http_client: Optional[httpx.Client] = None
+_shared_http_client_lock = threading.Lock()
+
+
+def _get_shared_http_client() -> httpx.Client:
+    """Get the process-wide keep-alive HTTP/2 pool for sync LLM traffic."""
+    global _shared_http_client
+    with _shared_http_client_lock:
+        if _shared_http_client is None:
+            _shared_http_client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=60.0,
+            )
+        return _shared_http_client
+
+
+def _create_async_http_client() -> httpx.AsyncClient:
+    """Create a keep-alive, HTTP/2 connection pool for async LLM traffic."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=60.0,
+    )
+
 
 class GroqService:
     """
@@ -15,14 +66,30 @@ class GroqService:
     It follows the single responsibility principle by only handling LLM interactions
     and not containing any business logic.
     
+    Use instance() to share one service across the process.
+    
+    Responses to temperature-0 requests are deterministic, so the most
+    recent RESPONSE_CACHE_SIZE of them are kept in an in-memory LRU and
+    identical requests are answered without an API call.
+    
     Attributes:
         client: OpenAI client configured for Groq API
     """
     
-    def __init__(self) -> None:
+    # Temperature-0 responses kept in the in-memory LRU
+    RESPONSE_CACHE_SIZE = 512
+    
+    _instance: Optional["GroqService"] = None
+    _instance_lock = threading.Lock()
+    
+    def __init__(self, http_client: Optional[httpx.Client] = None) -> None:
         """
         Initialize the Groq service client.
         
+        Args:
+            http_client: Optional httpx.Client for sync calls (default: a
+                keep-alive pool shared by all GroqService instances)
+        
         Raises:
             ValueError: If GROQ_API_KEY environment variable is not set
         """
@@ -31,37 +98,85 @@ class GroqService:
         if not api_key:
             raise ValueError("GROQ_API_KEY environment variable is not set")
         
+        self.api_key = api_key
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://api.groq.com/openai/v1",
+            base_url=GROQ_BASE_URL,
+            http_client=http_client or _get_shared_http_client(),
+            timeout=REQUEST_TIMEOUT,
+            max_retries=MAX_RETRIES,
         )
+        self._response_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._response_cache_lock = threading.Lock()
     
-    def generate_response(
-        self,
-        user_message: str,
-        system_message: Optional[str] = None,
-        model: str = "llama-3.1-8b-instant",
-        temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None,
-    ) -> str:
+    @classmethod
+    def instance(cls) -> "GroqService":
         """
-        Generate a response from the Groq LLM.
-        
-        This method makes a raw API call to Groq's LLM and returns the generated text.
-        It supports system and user messages, with optional temperature and max_tokens.
-        
-        Args:
-            user_message: The user's input prompt/question
-            system_message: Optional system message to set the assistant's behavior
-            model: The model to use (default: llama-3.1-8b-instant)
-            temperature: Optional sampling temperature (0.0 to 2.0)
-            max_tokens: Optional maximum number of tokens to generate
+        Get the process-wide service, creating it on first use.
         
         Returns:
-            The generated response text from the LLM
+            The shared GroqService
         
         Raises:
-            Exception: If the API call fails or returns an invalid response
+            ValueError: If GROQ_API_KEY environment variable is not set
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+    
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """
+        AsyncOpenAI client for the running event loop.
+        
+        The client and its connection pool are created on first use in each
+        event loop and reused for every later call on that loop.
+        """
+        loop = asyncio.get_running_loop()
+        client = _client_by_loop.get(loop)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=GROQ_BASE_URL,
+                http_client=_create_async_http_client(),
+                timeout=REQUEST_TIMEOUT,
+                max_retries=MAX_RETRIES,
+            )
+            _client_by_loop[loop] = client
+        return client
+    
+    @classmethod
+    async def aclose(cls) -> None:
+        """
+        Close the running event loop's AsyncOpenAI client and its connections.
+        
+        Async clients are shared per loop by every GroqService, so this can be
+        called on the class or on any instance. A later call on the same loop
+        creates a fresh client.
+        """
+        client = _client_by_loop.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+    
+    @staticmethod
+    def _build_request_params(
+        user_message: str,
+        system_message: Optional[str],
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+    ) -> Dict[str, Any]:
+        """
+        Build the chat completion request parameters.
+        
+        Shared by the sync and async call paths so both send identical payloads.
+        The system prompt is always the first message and is sent unchanged,
+        so the provider's automatic prefix caching can reuse its prefill
+        across calls; variable content belongs in the user message only.
+        
+        Returns:
+            Keyword arguments for chat.completions.create
         """
         messages: List[Dict[str, str]] = []
         
@@ -87,9 +202,224 @@ class GroqService:
         if max_tokens is not None:
             request_params["max_tokens"] = max_tokens
         
-        response = self.client.chat.completions.create(**request_params)
+        return request_params
+    
+    @staticmethod
+    def _extract_content(response: Any) -> str:
+        """
+        Extract the generated text from a chat completion response.
         
+        Raises:
+            ValueError: If the response has no content
+        """
         if not response.choices or not response.choices[0].message.content:
             raise ValueError("Invalid response from Groq API: empty content")
         
         return response.choices[0].message.content
+    
+    @staticmethod
+    def _response_cache_key(
+        user_message: str,
+        system_message: Optional[str],
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+    ) -> Optional[str]:
+        """
+        SHA-256 key for the response LRU, or None when the request is not cacheable.
+        
+        Only temperature 0 is cached; None means the provider's default
+        sampling temperature, which is not deterministic.
+        """
+        if temperature != 0:
+            return None
+        
+        digest = hashlib.sha256()
+        for part in (model, repr(max_tokens), system_message or "", user_message):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+    
+    def _get_cached_response(self, key: Optional[str]) -> Optional[str]:
+        """Look up a response in the LRU, marking it as recently used."""
+        if key is None:
+            return None
+        with self._response_cache_lock:
+            response = self._response_cache.get(key)
+            if response is not None:
+                self._response_cache.move_to_end(key)
+            return response
+    
+    def _cache_response(self, key: Optional[str], response: str) -> None:
+        """Store a response in the LRU, evicting the least recently used entry."""
+        if key is None:
+            return
+        with self._response_cache_lock:
+            self._response_cache[key] = response
+            self._response_cache.move_to_end(key)
+            while len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
+    @staticmethod
+    def _log_usage(response: Any) -> None:
+        """
+        Log token usage, including prompt tokens served from the provider's prefix cache.
+        
+        Providers that do not report cached tokens log cached_tokens as 0.
+        """
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        logger.info(
+            "llm_usage",
+            extra={
+                "agent": "GroqService",
+                "model": getattr(response, "model", None),
+                "prompt_tokens": usage.prompt_tokens,
+                "cached_tokens": cached_tokens,
+                "completion_tokens": usage.completion_tokens,
+            }
+        )
+    
+    def generate_response(
+        self,
+        user_message: str,
+        system_message: Optional[str] = None,
+        model: str = "llama-3.1-8b-instant",
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Generate a response from the Groq LLM.
+        
+        This method makes a raw API call to Groq's LLM and returns the generated text.
+        It supports system and user messages, with optional temperature and max_tokens.
+        
+        Args:
+            user_message: The user's input prompt/question
+            system_message: Optional system message to set the assistant's behavior
+            model: The model to use (default: llama-3.1-8b-instant)
+            temperature: Optional sampling temperature (0.0 to 2.0)
+            max_tokens: Optional maximum number of tokens to generate
+        
+        Returns:
+            The generated response text from the LLM
+        
+        Raises:
+            Exception: If the API call fails or returns an invalid response
+        """
+        cache_key = self._response_cache_key(
+            user_message, system_message, model, temperature, max_tokens
+        )
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        request_params = self._build_request_params(
+            user_message, system_message, model, temperature, max_tokens
+        )
+        
+        response = self.client.chat.completions.create(**request_params)
+        self._log_usage(response)
+        
+        content = self._extract_content(response)
+        self._cache_response(cache_key, content)
+        return content
+    
+    async def agenerate_response(
+        self,
+        user_message: str,
+        system_message: Optional[str] = None,
+        model: str = "llama-3.1-8b-instant",
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Async variant of generate_response.
+        
+        Awaits the request on the async client so concurrent agent calls
+        do not block the event loop or a worker thread.
+        
+        Args:
+            user_message: The user's input prompt/question
+            system_message: Optional system message to set the assistant's behavior
+            model: The model to use (default: llama-3.1-8b-instant)
+            temperature: Optional sampling temperature (0.0 to 2.0)
+            max_tokens: Optional maximum number of tokens to generate
+        
+        Returns:
+            The generated response text from the LLM
+        
+        Raises:
+            Exception: If the API call fails or returns an invalid response
+        """
+        cache_key = self._response_cache_key(
+            user_message, system_message, model, temperature, max_tokens
+        )
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        request_params = self._build_request_params(
+            user_message, system_message, model, temperature, max_tokens
+        )
+        
+        response = await self.async_client.chat.completions.create(**request_params)
+        self._log_usage(response)
+        
+        content = self._extract_content(response)
+        self._cache_response(cache_key, content)
+        return content
+    
+    async def agenerate_batch(
+        self,
+        user_messages: List[str],
+        system_message: Optional[str] = None,
+        model: str = "llama-3.1-8b-instant",
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        concurrency: int = BATCH_CONCURRENCY,
+    ) -> List[str]:
+        """
+        Generate responses for many prompts concurrently.
+        
+        At most `concurrency` requests are in flight at once, so N prompts
+        take roughly N / concurrency round trips instead of N.
+        
+        Args:
+            user_messages: The user prompts, one response each
+            system_message: Optional system message shared by every prompt
+            model: The model to use (default: llama-3.1-8b-instant)
+            temperature: Optional sampling temperature (0.0 to 2.0)
+            max_tokens: Optional maximum number of tokens to generate
+            concurrency: Maximum concurrent requests (default: 5)
+        
+        Returns:
+            The generated response texts, in prompt order
+        
+        Raises:
+            ValueError: If concurrency is not a positive integer
+            Exception: If any API call fails or returns an invalid response
+        """
+        if concurrency <= 0:
+            raise ValueError("concurrency must be a positive integer")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def bounded(user_message: str) -> str:
+            async with semaphore:
+                return await self.agenerate_response(
+                    user_message=user_message,
+                    system_message=system_message,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+        
+        return list(await asyncio.gather(*(bounded(m) for m in user_messages)))
@@ -0,0 +1,210 @@
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import logging
+import weakref
+from app.services.llm.groq import GroqService
+
+
+logger = logging.getLogger(__name__)
+
+
+class LLMJob:
+    """A queued chat completion request and the future its callers await."""
+
+    __slots__ = ("user_message", "system_message", "model", "temperature", "max_tokens", "future")
+
+    def __init__(
+        self,
+        user_message: str,
+        system_message: Optional[str],
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        future: asyncio.Future
+    ):
+        self.user_message = user_message
+        self.system_message = system_message
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.future = future
+
+
+class _LoopState:
+    """Queue, workers and in-flight jobs belonging to one event loop."""
+
+    def __init__(self, max_queue_size: int):
+        self.queue: "asyncio.Queue[LLMJob]" = asyncio.Queue(maxsize=max_queue_size)
+        self.workers: List[asyncio.Task] = []
+        self.inflight: Dict[bytes, asyncio.Future] = {}
+        self.rate_lock = asyncio.Lock()
+        self.next_slot = 0.0
+
+
+class LLMWorkerPool:
+    """
+    Process-wide pool of async workers that owns all Groq calls.
+
+    Agents submit jobs instead of calling the LLM service directly, so the
+    number of concurrent Groq requests is bounded by the worker count no
+    matter how many blueprint requests are being served. Identical requests
+    already in flight are coalesced onto one job, and an optional global
+    rate limit spaces out dispatches.
+
+    Workers are started lazily on the first submission from each event loop.
+
+    Attributes:
+        llm_service: The Groq LLM service used by the workers
+        workers: Number of concurrent workers per event loop
+        max_queue_size: Maximum number of queued jobs before submitters wait
+        requests_per_second: Optional global dispatch rate limit
+    """
+
+    def __init__(
+        self,
+        llm_service: Optional[GroqService] = None,
+        workers: int = 8,
+        max_queue_size: int = 256,
+        requests_per_second: Optional[float] = None
+    ):
+        """
+        Initialize the worker pool.
+
+        Args:
+            llm_service: Optional GroqService instance (default: the shared GroqService.instance())
+            workers: Number of concurrent workers per event loop (default: 8)
+            max_queue_size: Maximum number of queued jobs (default: 256)
+            requests_per_second: Optional dispatch rate limit (default: unlimited)
+
+        Raises:
+            ValueError: If workers, max_queue_size or requests_per_second is not positive
+        """
+        if workers <= 0:
+            raise ValueError("workers must be a positive integer")
+        if max_queue_size <= 0:
+            raise ValueError("max_queue_size must be a positive integer")
+        if requests_per_second is not None and requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+
+        self.llm_service = llm_service or GroqService.instance()
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.requests_per_second = requests_per_second
+        self._state_by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _state(self) -> _LoopState:
+        """Get the current loop's state, starting its workers on first use."""
+        loop = asyncio.get_running_loop()
+        state = self._state_by_loop.get(loop)
+        if state is None:
+            state = _LoopState(self.max_queue_size)
+            state.workers = [
+                loop.create_task(self._worker(state)) for _ in range(self.workers)
+            ]
+            self._state_by_loop[loop] = state
+            logger.info(
+                "Started %d workers", self.workers, extra={"agent": type(self).__name__}
+            )
+        return state
+
+    @staticmethod
+    def _job_key(
+        user_message: str,
+        system_message: Optional[str],
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> bytes:
+        """Hash the request fields that determine the response."""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (model, repr(temperature), repr(max_tokens), system_message or "", user_message):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.digest()
+
+    async def _throttle(self, state: _LoopState) -> None:
+        """Wait for the next dispatch slot when a rate limit is configured."""
+        if self.requests_per_second is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        async with state.rate_lock:
+            now = loop.time()
+            if state.next_slot > now:
+                await asyncio.sleep(state.next_slot - now)
+            state.next_slot = max(now, state.next_slot) + 1.0 / self.requests_per_second
+
+    async def _worker(self, state: _LoopState) -> None:
+        """Pull jobs off the queue and resolve their futures until cancelled."""
+        while True:
+            job = await state.queue.get()
+            try:
+                if job.future.done():
+                    continue
+                await self._throttle(state)
+                response = await self.llm_service.agenerate_response(
+                    user_message=job.user_message,
+                    system_message=job.system_message,
+                    model=job.model,
+                    temperature=job.temperature,
+                    max_tokens=job.max_tokens
+                )
+                if not job.future.done():
+                    job.future.set_result(response)
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                state.queue.task_done()
+
+    async def agenerate_response(
+        self,
+        user_message: str,
+        system_message: Optional[str] = None,
+        model: str = "llama-3.1-8b-instant",
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Queue a chat completion and wait for its result.
+
+        Mirrors GroqService.agenerate_response. If an identical request is
+        already queued or running, its result is shared instead of issuing
+        a second call. Cancelling one caller does not cancel the shared job.
+
+        Args:
+            user_message: The user's message/prompt
+            system_message: Optional system message to set context
+            model: The model to use (default: llama-3.1-8b-instant)
+            temperature: Sampling temperature (default: provider default)
+            max_tokens: Maximum tokens to generate
+
+        Returns:
+            Generated response text
+
+        Raises:
+            Exception: If the LLM call fails
+        """
+        state = self._state()
+        key = self._job_key(user_message, system_message, model, temperature, max_tokens)
+
+        future = state.inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            state.inflight[key] = future
+            future.add_done_callback(lambda _: state.inflight.pop(key, None))
+            job = LLMJob(user_message, system_message, model, temperature, max_tokens, future)
+            try:
+                await state.queue.put(job)
+            except BaseException:
+                future.cancel()
+                raise
+        else:
+            logger.debug(
+                "Coalesced identical in-flight request", extra={"agent": type(self).__name__}
+            )
+
+        return await asyncio.shield(future)
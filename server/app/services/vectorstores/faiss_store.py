@@ -1,7 +1,105 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+import copy
 import faiss
+import hashlib
+import logging
+import os
+import threading
 import numpy as np
-from typing import List, Dict, Any
-from uuid import uuid4
+import orjson
+from typing import Iterator, List, Dict, Any, Optional, Tuple, Union
+from uuid import UUID
+
+
+logger = logging.getLogger(__name__)
+
+# Set BLUEPRINT_FAISS_EXACT=1 to force exhaustive search in every store,
+# e.g. for small corpora where a brute-force scan is cheap
+EXACT_SEARCH_ENV = "BLUEPRINT_FAISS_EXACT"
+# Exhaustive index over fp16 codes: half the memory traffic of float32
+# with negligible effect on cosine rankings of normalized embeddings
+EXACT_INDEX_TYPE = "SQfp16"
+
+# Set BLUEPRINT_FAISS_GPU=1 to keep indexes on GPU 0 when faiss was built
+# with GPU support and a GPU is present; otherwise indexes stay on the CPU
+GPU_ENV = "BLUEPRINT_FAISS_GPU"
+
+# File names of a persisted store inside its persist_dir: the manifest
+# names the committed index generation and document count, metadata rows
+# are appended one orjson line per document
+MANIFEST_FILE = "manifest.json"
+METADATA_FILE = "metadata.jsonl"
+INDEX_FILE_TEMPLATE = "index.{generation}.faiss"
+INDEX_FILE_GLOB = "index.*.faiss"
+# Canonical UUID strings are 36 characters
+DOCUMENT_ID_DTYPE = "<U36"
+
+
+def _normalized(vectors: np.ndarray, copy: bool = True) -> np.ndarray:
+    """
+    L2-normalize the rows of a float32 array for FAISS.
+    
+    With copy set, a C-contiguous copy is normalized and the input is left
+    untouched; without it, an array the caller owns is normalized in place
+    (copied only if it is not already C-contiguous float32).
+    """
+    if copy:
+        array = np.array(vectors, dtype=np.float32, order="C", ndmin=2)
+    else:
+        array = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(array)
+    return array
+
+
+class _ReadWriteLock:
+    """
+    Lock held by any number of readers or by a single writer.
+    
+    FAISS indexes can be searched from several threads at once but not
+    while vectors are being added. Waiting writers block new readers, so a
+    steady stream of searches cannot starve an add.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock shared with other readers."""
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock exclusively."""
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writing or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
 
 
 class FAISSVectorStore:
@@ -12,42 +110,377 @@ class FAISSVectorStore:
     and performing similarity searches. Metadata is stored separately from
     the FAISS index to allow flexible querying.
     
+    Vectors are stored L2-normalized and searched by inner product, so
+    search scores are cosine similarities in [-1, 1] and exact search is a
+    single matrix multiply.
+    
+    The index is built from a faiss.index_factory string. The default
+    "HNSW32" is a graph index with sub-linear approximate search; "SQfp16"
+    scans every vector stored as fp16 (half the size of "Flat" float32),
+    and quantized indexes such as "IVF256,SQ8" store a quarter. Indexes that
+    need training serve exhaustive searches from an fp16 staging index until
+    train_size vectors have been added (at least 39 per IVF list, e.g.
+    9984 for "IVF256,SQ8"), then are trained on those vectors and take over.
+    
+    Results of similarity_search are kept in a small LRU keyed by the query
+    vector and k, so repeated queries skip the index; adding documents
+    clears it.
+    
+    Searches can run from several threads at once; add_documents waits for
+    running searches and holds new ones back while it grows the index.
+    
+    With persist_dir set, every add_documents call writes through to disk:
+    the new metadata rows are appended, the index is written to a new
+    generation file, and replacing the small manifest commits both. A crash
+    at any point leaves the previous generation loadable; load() drops
+    metadata rows appended after it and fails if the index and metadata
+    disagree. The index is memory-mapped by default so a large corpus is not
+    read into RAM at startup, and read fully into memory before its first
+    write.
+    
+    With BLUEPRINT_FAISS_GPU=1, indexes are moved to GPU 0 for search and
+    copied back to the host when saved. Index types without a GPU
+    implementation (e.g. HNSW), or a faiss build without GPU support, fall
+    back to the CPU.
+    
     Attributes:
         dimension: The dimension of the embeddings
+        index_type: faiss.index_factory description of the index
         index: The FAISS index for vector storage and search
-        metadata: List of metadata dictionaries, one per document
+        document_ids: Array of document IDs, one per indexed vector
+        metadata: List of metadata dictionaries, one per document (decoded
+            on access; search results decode only their own rows)
+        version: Counter bumped on every write, for cache invalidation
+        persist_dir: Optional directory the store is written through to
     """
     
-    def __init__(self, dimension: int):
+    # Maximum number of cached similarity_search results
+    QUERY_CACHE_SIZE = 256
+    # Training vectors per inverted list below which FAISS warns that
+    # k-means centroids, and so IVF recall, will be poor
+    MIN_TRAINING_POINTS_PER_LIST = 39
+    
+    def __init__(
+        self,
+        dimension: int,
+        index_type: str = "HNSW32",
+        train_size: int = 1000,
+        nprobe: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        persist_dir: Optional[Union[str, Path]] = None
+    ):
         """
         Initialize the FAISS vector store.
         
         Args:
             dimension: The dimension of the embeddings (must be > 0)
+            index_type: faiss.index_factory string (default: "HNSW32", 32
+                graph neighbours per vector); overridden with "SQfp16" when
+                BLUEPRINT_FAISS_EXACT=1
+            train_size: Vectors to collect before training an index that
+                needs it, raised to MIN_TRAINING_POINTS_PER_LIST times the
+                IVF list count if that is larger (default: 1000)
+            nprobe: Inverted lists probed per query by IVF indexes (default: 16)
+            ef_construction: Build-time candidate list size of HNSW indexes
+                (default: 200)
+            ef_search: Search-time candidate list size of HNSW indexes;
+                higher trades speed for recall (default: 64)
+            persist_dir: Optional directory to write the store through to
+                after every add (default: memory only)
         
         Raises:
-            ValueError: If dimension is not a positive integer
+            ValueError: If dimension or train_size is not a positive integer
+            ValueError: If index_type is not a valid factory string
         """
         if dimension <= 0:
             raise ValueError("Dimension must be a positive integer")
+        if train_size <= 0:
+            raise ValueError("train_size must be a positive integer")
+        
+        if os.environ.get(EXACT_SEARCH_ENV) == "1":
+            index_type = EXACT_INDEX_TYPE
         
         self.dimension = dimension
-        # Initialize FAISS index with L2 distance (Euclidean)
-        # Use IndexFlatL2 for exact search
-        self.index = faiss.IndexFlatL2(dimension)
-        # Store metadata for each document (indexed by position in FAISS index)
-        self.metadata: List[Dict[str, Any]] = []
+        self.index_type = index_type
+        self.train_size = train_size
+        self.nprobe = nprobe
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._gpu_resources = self._create_gpu_resources()
+        # Inner product of normalized vectors (cosine)
+        try:
+            self.index = faiss.index_factory(dimension, index_type, faiss.METRIC_INNER_PRODUCT)
+        except RuntimeError as e:
+            raise ValueError(f"Invalid FAISS index type: {index_type}") from e
+        self._configure_index()
+        try:
+            # k-means needs enough training vectors per inverted list
+            nlist = faiss.extract_index_ivf(self.index).nlist
+            self.train_size = max(train_size, self.MIN_TRAINING_POINTS_PER_LIST * nlist)
+        except RuntimeError:
+            pass  # Not an IVF index
+        self.index = self._to_device(self.index)
+        # Until the index is trained, vectors are kept (and searched) here
+        self._staging: Optional[faiss.Index] = (
+            None if self.index.is_trained else self._to_device(faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+            ))
+        )
+        # Per-document columns, indexed by position in the FAISS index: IDs
+        # in a fixed-width array, metadata as orjson-encoded rows decoded
+        # only for search hits
+        self.document_ids: np.ndarray = np.empty(0, dtype=DOCUMENT_ID_DTYPE)
+        self._metadata_rows: List[bytes] = []
+        self.version = 0
+        # (query vector hash, k) -> results of similarity_search
+        self._query_cache: "OrderedDict[Tuple[bytes, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        # Serializes writes so the index, metadata and files stay aligned
+        self._write_lock = threading.Lock()
+        # Searches share the index; growing it and its columns is exclusive
+        self._index_lock = _ReadWriteLock()
+        self.persist_dir = Path(persist_dir) if persist_dir is not None else None
+        self._mmapped = False
+        # Index file generation, metadata rows and metadata file bytes
+        # committed to persist_dir
+        self._generation = 0
+        self._persisted_count = 0
+        self._persisted_size = 0
+        if self.persist_dir is not None:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def _create_gpu_resources() -> Optional[Any]:
+        """GPU resources when BLUEPRINT_FAISS_GPU=1 and a usable GPU exists, else None."""
+        if os.environ.get(GPU_ENV) != "1":
+            return None
+        try:
+            if faiss.get_num_gpus() > 0:
+                return faiss.StandardGpuResources()
+        except AttributeError:
+            pass  # faiss built without GPU support
+        logger.warning(f"{GPU_ENV} is set but no GPU is available to faiss; using the CPU")
+        return None
+    
+    def _to_device(self, index: faiss.Index) -> faiss.Index:
+        """Move a CPU index to the GPU when GPU resources are set up."""
+        if self._gpu_resources is None:
+            return index
+        try:
+            return faiss.index_cpu_to_gpu(self._gpu_resources, 0, index)
+        except RuntimeError as e:
+            logger.warning(f"Keeping {type(index).__name__} on the CPU: {str(e)}")
+            return index
+    
+    def _to_host(self, index: faiss.Index) -> faiss.Index:
+        """CPU copy of an index for serialization (the index itself when on the CPU)."""
+        if self._gpu_resources is None:
+            return index
+        return faiss.index_gpu_to_cpu(index)
+    
+    def _configure_index(self) -> None:
+        """Apply the search parameters to self.index."""
+        try:
+            faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+        except RuntimeError:
+            pass  # Not an IVF index
+        hnsw = getattr(self.index, "hnsw", None)
+        if hnsw is not None:
+            hnsw.efConstruction = self.ef_construction
+            hnsw.efSearch = self.ef_search
+    
+    @classmethod
+    def load(
+        cls,
+        persist_dir: Union[str, Path],
+        mmap: bool = True,
+        **kwargs: Any
+    ) -> "FAISSVectorStore":
+        """
+        Reopen a store saved to persist_dir; later adds are written back to it.
+        
+        Args:
+            persist_dir: Directory the store was persisted to
+            mmap: Memory-map the index file instead of reading it into RAM
+                (default: True)
+            **kwargs: Search options forwarded to the constructor (e.g. nprobe)
+        
+        Returns:
+            The loaded FAISSVectorStore
+        
+        Raises:
+            FileNotFoundError: If no store has been saved to persist_dir
+            ValueError: If the index and metadata files do not match the manifest
+        """
+        persist_dir = Path(persist_dir)
+        manifest_path = persist_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"No FAISS store manifest at {manifest_path}")
+        
+        manifest = orjson.loads(manifest_path.read_bytes())
+        count = manifest["count"]
+        index_path = persist_dir / INDEX_FILE_TEMPLATE.format(generation=manifest["generation"])
+        index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP if mmap else 0)
+        if index.ntotal != count:
+            raise ValueError(
+                f"FAISS index {index_path} has {index.ntotal} vectors, "
+                f"manifest expects {count}"
+            )
+        metadata_rows, metadata_size = cls._read_metadata_rows(persist_dir / METADATA_FILE, count)
+        
+        # Index files of other generations are left over from interrupted saves
+        for path in persist_dir.glob(INDEX_FILE_GLOB):
+            if path != index_path:
+                path.unlink(missing_ok=True)
+        
+        store = cls(
+            dimension=index.d,
+            index_type=manifest["index_type"],
+            train_size=manifest["train_size"],
+            persist_dir=persist_dir,
+            **kwargs
+        )
+        if manifest["trained"]:
+            store.index = index
+            store._configure_index()
+            store.index = store._to_device(store.index)
+            store._staging = None
+        else:
+            store._staging = store._to_device(index)
+        store._set_metadata_rows(metadata_rows)
+        store._generation = manifest["generation"]
+        store._persisted_count = count
+        store._persisted_size = metadata_size
+        # Indexes copied to the GPU no longer depend on the mapped file
+        store._mmapped = mmap and store._gpu_resources is None
+        
+        logger.info(f"Loaded {index.ntotal} documents from FAISS store at {persist_dir}")
+        return store
+    
+    def _ensure_writable(self) -> None:
+        """Replace a memory-mapped index with a fully loaded copy before writing."""
+        if not self._mmapped:
+            return
+        
+        index = faiss.read_index(str(self._index_path(self._generation)))
+        if self._staging is not None:
+            self._staging = index
+        else:
+            self.index = index
+            self._configure_index()
+        self._mmapped = False
+    
+    @property
+    def metadata(self) -> List[Dict[str, Any]]:
+        """Metadata dictionaries for every document, decoded from the stored rows."""
+        return [orjson.loads(row) for row in self._metadata_rows]
+    
+    @staticmethod
+    def _read_metadata_rows(metadata_path: Path, count: int) -> Tuple[List[bytes], int]:
+        """
+        Read the first count metadata rows and their size in bytes.
+        
+        Rows past count were written by a save that never committed its
+        manifest; the next save truncates them before appending.
+        
+        Raises:
+            ValueError: If the file holds fewer than count complete rows
+        """
+        data = metadata_path.read_bytes() if metadata_path.exists() else b""
+        rows = data.split(b"\n", count)
+        if len(rows) <= count:
+            # Fewer than count newline-terminated rows
+            raise ValueError(
+                f"FAISS metadata {metadata_path} has {len(rows) - 1} rows, "
+                f"manifest expects {count}"
+            )
+        
+        return rows[:count], len(data) - len(rows[count])
+    
+    def _set_metadata_rows(self, metadata_rows: List[bytes]) -> None:
+        """Replace the per-document columns with the given orjson-encoded rows."""
+        self.document_ids = np.array(
+            [orjson.loads(row)["document_id"] for row in metadata_rows],
+            dtype=DOCUMENT_ID_DTYPE
+        )
+        self._metadata_rows = metadata_rows
+    
+    def _index_path(self, generation: int) -> Path:
+        """Path of the index file of a persisted generation."""
+        return self.persist_dir / INDEX_FILE_TEMPLATE.format(generation=generation)
+    
+    def _save(self) -> None:
+        """
+        Commit new metadata rows and the index to persist_dir.
+        
+        Rows added since the last save are appended to the metadata file,
+        after dropping anything an uncommitted save left behind, and the
+        index is written under the next generation; replacing the manifest
+        then commits both at once. The previous generation's index file is
+        removed afterwards.
+        """
+        with open(self.persist_dir / METADATA_FILE, "ab") as metadata_file:
+            metadata_file.truncate(self._persisted_size)
+            for row in self._metadata_rows[self._persisted_count:]:
+                metadata_file.write(row + b"\n")
+            metadata_size = metadata_file.tell()
+        
+        generation = self._generation + 1
+        faiss.write_index(
+            self._to_host(self._search_index), str(self._index_path(generation))
+        )
+        
+        manifest_path = self.persist_dir / MANIFEST_FILE
+        tmp_manifest_path = manifest_path.with_suffix(".tmp")
+        tmp_manifest_path.write_bytes(orjson.dumps({
+            "index_type": self.index_type,
+            "train_size": self.train_size,
+            "trained": self._staging is None,
+            "generation": generation,
+            "count": len(self._metadata_rows),
+        }))
+        os.replace(tmp_manifest_path, manifest_path)
+        
+        self._index_path(self._generation).unlink(missing_ok=True)
+        self._generation = generation
+        self._persisted_count = len(self._metadata_rows)
+        self._persisted_size = metadata_size
+    
+    @property
+    def _search_index(self) -> faiss.Index:
+        """The index currently holding every vector: staging until trained."""
+        return self._staging if self._staging is not None else self.index
+    
+    def _add_vectors(self, embeddings_array: np.ndarray) -> None:
+        """Add vectors, training the index once enough have been staged."""
+        if self._staging is None:
+            self.index.add(embeddings_array)
+            return
+        
+        self._staging.add(embeddings_array)
+        if self._staging.ntotal < self.train_size:
+            return
+        
+        staged = self._staging.reconstruct_n(0, self._staging.ntotal)
+        self.index.train(staged)
+        self.index.add(staged)
+        self._staging = None
+        logger.info(
+            f"Trained {self.index_type} FAISS index on {len(staged)} vectors"
+        )
     
     def add_documents(
         self,
-        embeddings: List[List[float]],
+        embeddings: Union[List[List[float]], np.ndarray],
         metadata: List[Dict[str, Any]]
     ) -> List[str]:
         """
         Add documents to the vector store with embeddings and metadata.
         
         Args:
-            embeddings: List of embedding vectors (each is a list of floats)
+            embeddings: Embedding vectors, as lists of floats or an (n, dimension)
+                array; they are stored normalized, the input is not modified
             metadata: List of metadata dictionaries, one per document
         
         Returns:
@@ -67,38 +500,63 @@ class FAISSVectorStore:
         if len(embeddings) == 0:
             raise ValueError("Cannot add empty list of documents")
         
-        # Validate embedding dimensions
-        for i, embedding in enumerate(embeddings):
-            if len(embedding) != self.dimension:
-                raise ValueError(
-                    f"Embedding at index {i} has dimension {len(embedding)}, "
-                    f"expected {self.dimension}"
-                )
-        
-        # Generate document IDs for each document
-        document_ids = [str(uuid4()) for _ in range(len(embeddings))]
+        # Validate embedding dimensions on the array shape
+        try:
+            embeddings_array = np.asarray(embeddings, dtype=np.float32)
+        except ValueError as e:
+            raise ValueError(f"Embeddings must all have dimension {self.dimension}") from e
+        if embeddings_array.ndim != 2 or embeddings_array.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embeddings have shape {embeddings_array.shape}, "
+                f"expected (n, {self.dimension})"
+            )
         
-        # Add document IDs to metadata
-        enriched_metadata = []
-        for meta, doc_id in zip(metadata, document_ids):
-            enriched_meta = meta.copy()
-            enriched_meta["document_id"] = doc_id
-            enriched_metadata.append(enriched_meta)
+        # Generate random (version 4) document IDs from one urandom call
+        count = len(metadata)
+        raw = os.urandom(16 * count)
+        document_ids = [
+            str(UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * count, 16)
+        ]
         
-        # Convert embeddings to numpy array (float32 for FAISS)
-        embeddings_array = np.array(embeddings, dtype=np.float32)
+        # Encode metadata rows with their document IDs
+        metadata_rows = [
+            orjson.dumps({**meta, "document_id": doc_id})
+            for meta, doc_id in zip(metadata, document_ids)
+        ]
         
-        # Add to FAISS index
-        self.index.add(embeddings_array)
+        # Normalize for FAISS; arrays built from lists above are ours to
+        # normalize in place, caller arrays are copied
+        embeddings_array = _normalized(
+            embeddings_array, copy=isinstance(embeddings, np.ndarray)
+        )
         
-        # Store metadata
-        self.metadata.extend(enriched_metadata)
+        with self._write_lock:
+            with self._index_lock.write():
+                self._ensure_writable()
+                
+                # Store metadata, then add to FAISS index; searches see both or neither
+                previous_count = len(self._metadata_rows)
+                self.document_ids = np.concatenate([
+                    self.document_ids, np.array(document_ids, dtype=DOCUMENT_ID_DTYPE)
+                ])
+                self._metadata_rows.extend(metadata_rows)
+                try:
+                    self._add_vectors(embeddings_array)
+                except BaseException:
+                    self.document_ids = self.document_ids[:previous_count]
+                    self._metadata_rows = self._metadata_rows[:previous_count]
+                    raise
+            self.version += 1
+            with self._query_cache_lock:
+                self._query_cache.clear()
+            
+            if self.persist_dir is not None:
+                self._save()
         
         # Log success
-        import logging
-        logging.getLogger(__name__).info(
+        logger.info(
             f"Successfully added {len(embeddings)} documents to FAISS index. "
-            f"Total documents: {self.index.ntotal}"
+            f"Total documents: {self._search_index.ntotal}"
         )
         
         return document_ids
@@ -111,6 +569,8 @@ class FAISSVectorStore:
         """
         Perform similarity search to find the k most similar documents.
         
+        Runs as a one-query similarity_search_batch, with results cached.
+        
         Args:
             query_embedding: The query embedding vector
             k: Number of most similar documents to return (default: 4)
@@ -119,15 +579,15 @@ class FAISSVectorStore:
             List of result dictionaries, each containing:
             - 'document_id': UUID of the document
             - 'metadata': The document's metadata
-            - 'distance': The L2 distance to the query (lower is more similar)
-            - 'score': Similarity score (1 / (1 + distance) for easier interpretation)
+            - 'similarity': Cosine similarity to the query (higher is more similar)
+            - 'score': Same as similarity
         
         Raises:
             ValueError: If query embedding dimension doesn't match store dimension
             ValueError: If k is not a positive integer
             ValueError: If the index is empty
         """
-        if self.index.ntotal == 0:
+        if self._search_index.ntotal == 0:
             raise ValueError("Cannot search empty index")
         
         if k <= 0:
@@ -140,30 +600,106 @@ class FAISSVectorStore:
             )
         
         # Ensure k doesn't exceed number of documents
-        k = min(k, self.index.ntotal)
+        k = min(k, self._search_index.ntotal)
         
-        # Convert query embedding to numpy array (float32, reshaped for FAISS)
-        query_array = np.array([query_embedding], dtype=np.float32)
+        query_array = np.asarray(query_embedding, dtype=np.float32)
+        cache_key = (hashlib.sha256(query_array.tobytes()).digest(), k)
+        with self._query_cache_lock:
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self._query_cache.move_to_end(cache_key)
+                return copy.copy(cached)
         
-        # Perform search
-        distances, indices = self.index.search(query_array, k)
+        # Search as a batch of one, normalizing a list-built query in place
+        query_array = _normalized(
+            query_array.reshape(1, -1), copy=isinstance(query_embedding, np.ndarray)
+        )
+        results = self._search_normalized(query_array, k)[0]
         
-        # Build results
-        results = []
-        for distance, idx in zip(distances[0], indices[0]):
-            # FAISS returns -1 for invalid indices when k > ntotal
-            if idx == -1:
-                continue
-            
-            result = {
-                "document_id": self.metadata[idx]["document_id"],
-                "metadata": self.metadata[idx],
-                "distance": float(distance),
-                "score": float(1 / (1 + distance))  # Convert distance to similarity score
-            }
-            results.append(result)
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = results
+            while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        
+        return copy.copy(results)
+    
+    def similarity_search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 4
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Perform similarity search for several queries in one FAISS call.
+        
+        Args:
+            query_embeddings: Query embedding vectors, shape (n, dimension)
+            k: Number of most similar documents to return per query (default: 4)
+        
+        Returns:
+            One result list per query, each shaped like similarity_search results
+        
+        Raises:
+            ValueError: If the query embeddings don't have shape (n, dimension)
+            ValueError: If k is not a positive integer
+            ValueError: If the index is empty
+        """
+        if self._search_index.ntotal == 0:
+            raise ValueError("Cannot search empty index")
+        
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+        
+        query_array = np.asarray(query_embeddings, dtype=np.float32)
+        if query_array.ndim != 2 or query_array.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query embeddings have shape {query_array.shape}, "
+                f"expected (n, {self.dimension})"
+            )
+        query_array = _normalized(query_array, copy=isinstance(query_embeddings, np.ndarray))
+        
+        # Ensure k doesn't exceed number of documents
+        k = min(k, self._search_index.ntotal)
+        
+        return self._search_normalized(query_array, k)
+    
+    def _search_normalized(
+        self,
+        query_array: np.ndarray,
+        k: int
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search with already normalized queries and build one result list per query.
+        
+        The search and the per-document columns are read under the index
+        lock, so every returned position has its ID and metadata even when
+        documents are being added concurrently.
+        """
+        # Perform a single batched search for all queries
+        with self._index_lock.read():
+            similarities, indices = self._search_index.search(query_array, k)
+            document_id_column = self.document_ids
+            metadata_rows = self._metadata_rows
+        
+        # Convert to Python scalars in one call per array instead of per hit
+        document_ids = document_id_column[indices].tolist()
+        
+        batch_results = []
+        for query_ids, query_similarities, query_indices in zip(
+            document_ids, similarities.tolist(), indices.tolist()
+        ):
+            batch_results.append([
+                {
+                    "document_id": document_id,
+                    "metadata": orjson.loads(metadata_rows[idx]),
+                    "similarity": similarity,
+                    "score": similarity
+                }
+                for document_id, similarity, idx in zip(query_ids, query_similarities, query_indices)
+                # FAISS returns -1 for invalid indices when k > ntotal
+                if idx != -1
+            ])
         
-        return results
+        return batch_results
     
     def get_document_count(self) -> int:
         """
@@ -172,7 +708,7 @@ class FAISSVectorStore:
         Returns:
             Number of documents stored
         """
-        return self.index.ntotal
+        return self._search_index.ntotal
     
     def is_empty(self) -> bool:
         """
@@ -181,5 +717,5 @@ class FAISSVectorStore:
         Returns:
             True if no documents are stored, False otherwise
         """
-        return self.index.ntotal == 0
+        return self._search_index.ntotal == 0
 
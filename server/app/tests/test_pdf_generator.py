@@ -0,0 +1,68 @@
+import re
+from typing import List, Tuple
+
+from app.utils.pdf_generator import BlueprintPDFGenerator, _markdown_to_html
+
+
+# Text drawn by fpdf2: "BT <x> <y> Td ... (<text>) Tj ET"
+TEXT_OPERATOR_PATTERN = re.compile(rb"BT ([\d.]+) ([\d.]+) Td[^(]*\((.*?)\) Tj ET")
+
+CONTENT = """## Architecture
+
+```mermaid
+flowchart TD
+  A[User] --> B{RAG}
+  B --> C[LLM]
+```
+
+- Ingestion
+  - Chunking
+  - Embedding
+1. Discovery
+2. Delivery
+"""
+
+
+def _rendered_lines(content: str) -> List[Tuple[float, float, str]]:
+    """Render content to an uncompressed PDF and return (x, y, text) of each drawn line."""
+    generator = BlueprintPDFGenerator({"content": content})
+    generator.pdf.set_compression(False)
+    pdf = bytes(generator.generate_bytes())
+    return [
+        (float(x), float(y), text.decode("latin-1").replace("\\(", "(").replace("\\)", ")"))
+        for x, y, text in TEXT_OPERATOR_PATTERN.findall(pdf)
+    ]
+
+
+def _line(lines: List[Tuple[float, float, str]], text: str) -> Tuple[float, float, str]:
+    return next(line for line in lines if line[2].strip() == text)
+
+
+def test_fenced_mermaid_block_keeps_its_lines():
+    html = _markdown_to_html(CONTENT)
+    assert "<pre><code" in html
+
+    lines = _rendered_lines(CONTENT)
+    diagram = [
+        _line(lines, "flowchart TD"),
+        _line(lines, "A[User] --> B{RAG}"),
+        _line(lines, "B --> C[LLM]"),
+    ]
+    # Each diagram line is drawn on its own line, top to bottom
+    assert [line[1] for line in diagram] == sorted({line[1] for line in diagram}, reverse=True)
+
+
+def test_nested_list_is_indented():
+    html = _markdown_to_html(CONTENT)
+    assert re.search(r"<li>Ingestion<ul>\s*<li>Chunking</li>", html)
+
+    lines = _rendered_lines(CONTENT)
+    parent = _line(lines, "Ingestion")
+    child = _line(lines, "Chunking")
+    assert child[0] > parent[0]
+    assert child[1] < parent[1]
+
+
+def test_numbered_list_after_bullets_starts_a_new_list():
+    html = _markdown_to_html(CONTENT)
+    assert re.search(r"</ul>\s*<ol>\s*<li>Discovery</li>\s*<li>Delivery</li>\s*</ol>", html)
@@ -1,4 +1,4 @@
-from .chunking import chunk_text
-
-__all__ = ['chunk_text']
+from .chunking import chunk_text, chunk_text_stream
+from .context_budget import ContextBudgeter
 
+__all__ = ['chunk_text', 'chunk_text_stream', 'ContextBudgeter']
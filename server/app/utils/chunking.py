@@ -1,12 +1,31 @@
-from typing import List
+from functools import lru_cache
+from typing import Iterable, Iterator, List
 import tiktoken
 
 
+PARAGRAPH_SEPARATOR = "\n\n"
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(encoding_name: str) -> tiktoken.Encoding:
+    """
+    Load a tokenizer encoding once and reuse it for every later call.
+    
+    Raises:
+        ValueError: If encoding_name is invalid
+    """
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except KeyError as e:
+        raise ValueError(f"Invalid encoding name: {encoding_name}") from e
+
+
 def chunk_text(
     text: str,
     chunk_size: int = 512,
     chunk_overlap: int = 50,
-    encoding_name: str = "cl100k_base"
+    encoding_name: str = "cl100k_base",
+    pre_split: bool = False
 ) -> List[str]:
     """
     Split text into overlapping chunks based on token count.
@@ -24,6 +43,12 @@ def chunk_text(
                       - "cl100k_base": Used by GPT-4, GPT-3.5-turbo
                       - "p50k_base": Used by Codex models
                       - "r50k_base": Used by GPT-3 models
+        pre_split: Tokenize paragraphs (split on blank lines) in one parallel
+                   batch call instead of the whole text at once; faster on
+                   very large documents. Tokens may differ from a whole-text
+                   encode at paragraph boundaries, and special-token text
+                   such as "<|endoftext|>" is encoded as ordinary text
+                   (default: False)
     
     Returns:
         List of text chunks, each respecting the chunk_size token limit
@@ -50,13 +75,13 @@ def chunk_text(
         return []
     
     # Initialize tokenizer
-    try:
-        encoding = tiktoken.get_encoding(encoding_name)
-    except KeyError as e:
-        raise ValueError(f"Invalid encoding name: {encoding_name}") from e
+    encoding = _get_encoding(encoding_name)
     
     # Tokenize the entire text
-    tokens = encoding.encode(text)
+    if pre_split:
+        tokens = _encode_paragraphs(encoding, text)
+    else:
+        tokens = encoding.encode(text)
     
     # If text fits in one chunk, return it
     if len(tokens) <= chunk_size:
@@ -65,25 +90,90 @@ def chunk_text(
     # Calculate step size (how many tokens to advance for each chunk)
     step_size = chunk_size - chunk_overlap
     
-    # Generate chunks
-    chunks = []
-    start_idx = 0
+    # Window k starts at k * step_size; the last window is the first one that
+    # reaches the end, i.e. every start below len(tokens) - chunk_overlap
+    windows = [
+        tokens[start:start + chunk_size]
+        for start in range(0, len(tokens) - chunk_overlap, step_size)
+    ]
     
-    while start_idx < len(tokens):
-        # Get tokens for this chunk
-        end_idx = start_idx + chunk_size
-        chunk_tokens = tokens[start_idx:end_idx]
-        
-        # Decode tokens back to text
-        chunk_text = encoding.decode(chunk_tokens)
-        chunks.append(chunk_text)
-        
-        # Move to next chunk position
-        start_idx += step_size
-        
-        # If we're at the end, break to avoid empty chunks
-        if end_idx >= len(tokens):
-            break
+    # Decode all windows in one tokenizer call
+    return encoding.decode_batch(windows)
+
+
+def _encode_paragraphs(encoding: tiktoken.Encoding, text: str) -> List[int]:
+    """Encode text paragraph by paragraph, rejoined with blank-line tokens."""
+    paragraphs = text.split(PARAGRAPH_SEPARATOR)
+    separator_tokens = encoding.encode_ordinary(PARAGRAPH_SEPARATOR)
     
-    return chunks
+    tokens: List[int] = []
+    for i, paragraph_tokens in enumerate(encoding.encode_ordinary_batch(paragraphs)):
+        if i:
+            tokens.extend(separator_tokens)
+        tokens.extend(paragraph_tokens)
+    return tokens
+
 
+def chunk_text_stream(
+    texts: Iterable[str],
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    encoding_name: str = "cl100k_base",
+    separator: str = "\n"
+) -> Iterator[str]:
+    """
+    Chunk a stream of text pieces (e.g. PDF pages) as if they were joined.
+    
+    Produces the same windows as chunk_text over separator.join(texts), but
+    keeps only a rolling token buffer of roughly chunk_size tokens, so the
+    full text is never materialized. Pieces are tokenized separately, so a
+    token spanning a piece boundary may split differently than in chunk_text.
+    
+    Args:
+        texts: Text pieces in document order
+        chunk_size: Maximum number of tokens per chunk (default: 512)
+        chunk_overlap: Number of tokens to overlap between chunks (default: 50)
+        encoding_name: Tokenizer encoding name (default: "cl100k_base")
+        separator: Text placed between consecutive pieces (default: newline)
+    
+    Yields:
+        Text chunks, each respecting the chunk_size token limit
+    
+    Raises:
+        ValueError: If chunk_size <= 0, chunk_overlap < 0, or chunk_overlap >= chunk_size
+        ValueError: If encoding_name is invalid
+    """
+    # Validation
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be greater than 0")
+    if chunk_overlap < 0:
+        raise ValueError("chunk_overlap must be non-negative")
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be less than chunk_size")
+    
+    # Initialize tokenizer
+    encoding = _get_encoding(encoding_name)
+    
+    step_size = chunk_size - chunk_overlap
+    separator_tokens = encoding.encode(separator)
+    buffer: List[int] = []
+    has_content = False
+    emitted = False
+    first = True
+    
+    for text in texts:
+        if not first:
+            buffer.extend(separator_tokens)
+        first = False
+        buffer.extend(encoding.encode(text))
+        has_content = has_content or bool(text.strip())
+        
+        # Emit every full window; keep the overlap for the next one
+        while len(buffer) >= chunk_size and has_content:
+            yield encoding.decode(buffer[:chunk_size])
+            emitted = True
+            buffer = buffer[step_size:]
+    
+    # Final partial window, unless it would only repeat the last overlap
+    if has_content and buffer and (not emitted or len(buffer) > chunk_overlap):
+        yield encoding.decode(buffer)
@@ -0,0 +1,231 @@
+from typing import Awaitable, Callable, List, Optional, Tuple
+import asyncio
+import logging
+import re
+import tiktoken
+
+
+logger = logging.getLogger(__name__)
+
+# Fenced code blocks (including Mermaid diagrams) are kept verbatim
+_FENCE_RE = re.compile(r"^```.*?^```[^\n]*$", re.MULTILINE | re.DOTALL)
+_BLANK_LINES_RE = re.compile(r"\n\s*\n")
+_SPACES_RE = re.compile(r"[ \t]+")
+
+
+class ContextBudgeter:
+    """
+    Fit markdown context into a token budget.
+
+    Text already within budget is returned unchanged. Otherwise headers,
+    tables and fenced code blocks (e.g. Mermaid diagrams) are kept verbatim
+    and the prose between them is shortened: by the summarize callback when
+    one is given, by token truncation when not (or when it fails). Each prose
+    run gets a share of the remaining budget proportional to its length.
+
+    Attributes:
+        max_tokens: Total token budget that budget fractions are taken from
+        encoding_name: tiktoken encoding used to count tokens
+        summarize: Optional callback (text, max_tokens) -> shortened text
+        asummarize: Optional async variant of summarize
+    """
+
+    # Prose runs shorter than this are truncated rather than summarized
+    MIN_SUMMARY_TOKENS = 64
+
+    def __init__(
+        self,
+        max_tokens: int = 6000,
+        encoding_name: str = "cl100k_base",
+        summarize: Optional[Callable[[str, int], str]] = None,
+        asummarize: Optional[Callable[[str, int], Awaitable[str]]] = None
+    ):
+        """
+        Initialize the budgeter.
+
+        Args:
+            max_tokens: Total token budget (default: 6000)
+            encoding_name: Tokenizer encoding name (default: "cl100k_base")
+            summarize: Optional callback used by fit to shorten prose
+            asummarize: Optional callback used by afit to shorten prose
+
+        Raises:
+            ValueError: If max_tokens <= 0
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be greater than 0")
+
+        self.max_tokens = max_tokens
+        self.encoding_name = encoding_name
+        self.summarize = summarize
+        self.asummarize = asummarize
+        self._encoding: Optional[tiktoken.Encoding] = None
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        """
+        The tiktoken encoding, loaded on first use.
+
+        Raises:
+            ValueError: If encoding_name is invalid
+        """
+        if self._encoding is None:
+            try:
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except KeyError as e:
+                raise ValueError(f"Invalid encoding name: {self.encoding_name}") from e
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        """Count the tokens in text."""
+        return len(self.encoding.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text down to at most max_tokens tokens."""
+        tokens = self.encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens])
+
+    @staticmethod
+    def _is_verbatim(block: str) -> bool:
+        """Whether a paragraph is structure (header or table) rather than prose."""
+        first_line = block.lstrip().split("\n", 1)[0]
+        return first_line.startswith(("#", "|"))
+
+    def _split(self, text: str) -> List[Tuple[bool, str]]:
+        """
+        Split markdown into (verbatim, block) pairs.
+
+        Consecutive prose paragraphs are merged into one run so each section
+        body is shortened as a whole.
+        """
+        segments: List[Tuple[bool, str]] = []
+
+        def add_prose(prose: str) -> None:
+            for paragraph in _BLANK_LINES_RE.split(prose):
+                paragraph = _SPACES_RE.sub(" ", paragraph).strip()
+                if not paragraph:
+                    continue
+                verbatim = self._is_verbatim(paragraph)
+                if not verbatim and segments and not segments[-1][0]:
+                    segments[-1] = (False, segments[-1][1] + "\n\n" + paragraph)
+                else:
+                    segments.append((verbatim, paragraph))
+
+        position = 0
+        for fence in _FENCE_RE.finditer(text):
+            add_prose(text[position:fence.start()])
+            segments.append((True, fence.group(0)))
+            position = fence.end()
+        add_prose(text[position:])
+
+        return segments
+
+    def _plan(
+        self,
+        text: str,
+        budget: int
+    ) -> Tuple[List[Tuple[bool, str]], List[Tuple[int, int]]]:
+        """
+        Decide which prose runs to shorten and to how many tokens.
+
+        Returns:
+            The segments, and (segment index, token target) for each prose
+            run that exceeds its share of the budget
+        """
+        segments = self._split(text)
+        counts = [self.count(block) for _, block in segments]
+        verbatim_tokens = sum(n for (verbatim, _), n in zip(segments, counts) if verbatim)
+        prose_tokens = sum(n for (verbatim, _), n in zip(segments, counts) if not verbatim)
+        prose_budget = max(budget - verbatim_tokens, 0)
+
+        targets = []
+        for i, ((verbatim, _), n) in enumerate(zip(segments, counts)):
+            if verbatim:
+                continue
+            target = n * prose_budget // prose_tokens
+            if target < n:
+                targets.append((i, target))
+
+        return segments, targets
+
+    def _assemble(
+        self,
+        segments: List[Tuple[bool, str]],
+        replacements: List[Tuple[int, str]],
+        budget: int
+    ) -> str:
+        """Join segments with shortened prose, hard-truncating any overflow."""
+        blocks = [block for _, block in segments]
+        for i, shortened in replacements:
+            blocks[i] = shortened
+        result = "\n\n".join(block for block in blocks if block)
+        return self.truncate(result, budget)
+
+    def fit(self, text: str, budget_fraction: float = 1.0) -> str:
+        """
+        Fit text into budget_fraction of max_tokens.
+
+        Args:
+            text: Markdown text to fit
+            budget_fraction: Share of max_tokens this text may use (default: 1.0)
+
+        Returns:
+            The text, unchanged if it fits, otherwise shortened to the budget
+        """
+        budget = int(self.max_tokens * budget_fraction)
+        if self.count(text) <= budget:
+            return text
+
+        segments, targets = self._plan(text, budget)
+        replacements = [
+            (i, self._shorten(segments[i][1], target)) for i, target in targets
+        ]
+        return self._assemble(segments, replacements, budget)
+
+    async def afit(self, text: str, budget_fraction: float = 1.0) -> str:
+        """
+        Async variant of fit; prose runs are summarized concurrently.
+
+        Args:
+            text: Markdown text to fit
+            budget_fraction: Share of max_tokens this text may use (default: 1.0)
+
+        Returns:
+            The text, unchanged if it fits, otherwise shortened to the budget
+        """
+        budget = int(self.max_tokens * budget_fraction)
+        if self.count(text) <= budget:
+            return text
+
+        segments, targets = self._plan(text, budget)
+        shortened = await asyncio.gather(
+            *(self._ashorten(segments[i][1], target) for i, target in targets)
+        )
+        replacements = [(i, s) for (i, _), s in zip(targets, shortened)]
+        return self._assemble(segments, replacements, budget)
+
+    def _shorten(self, prose: str, target: int) -> str:
+        """Summarize prose to target tokens, falling back to truncation."""
+        if self.summarize is not None and target >= self.MIN_SUMMARY_TOKENS:
+            try:
+                return self.truncate(self.summarize(prose, target), target)
+            except Exception as e:
+                logger.warning(
+                    "Summarization failed, truncating: %s", e, exc_info=True,
+                    extra={"agent": type(self).__name__, "err_type": type(e).__name__}
+                )
+        return self.truncate(prose, target)
+
+    async def _ashorten(self, prose: str, target: int) -> str:
+        """Async variant of _shorten."""
+        if self.asummarize is not None and target >= self.MIN_SUMMARY_TOKENS:
+            try:
+                return self.truncate(await self.asummarize(prose, target), target)
+            except Exception as e:
+                logger.warning(
+                    "Summarization failed, truncating: %s", e, exc_info=True,
+                    extra={"agent": type(self).__name__, "err_type": type(e).__name__}
+                )
+        return self.truncate(prose, target)
@@ -1,14 +1,117 @@
-from fpdf import FPDF
-from typing import Dict, Any
+from fpdf import FPDF, TextStyle
+from markdown.preprocessors import Preprocessor
+from typing import BinaryIO, Dict, Any, List, Union
 from pathlib import Path
 import io
+import markdown
+import os
+import re
+import tempfile
+import threading
+
+
+# Heading and paragraph styles for the rendered Markdown content
+CONTENT_STYLES = {
+    "h1": TextStyle(font_family="helvetica", font_style="B", font_size_pt=18,
+                    color=(31, 73, 125), t_margin=4, b_margin=2),
+    "h2": TextStyle(font_family="helvetica", font_style="B", font_size_pt=14,
+                    color=(50, 50, 50), t_margin=4, b_margin=2),
+    "h3": TextStyle(font_family="helvetica", font_style="B", font_size_pt=12,
+                    color=(0, 0, 0), t_margin=3, b_margin=2),
+    "p": TextStyle(font_family="helvetica", font_size_pt=11, color=(0, 0, 0), b_margin=2),
+}
+
+
+# Markdown list item: indentation, marker and the rest of the line
+LIST_ITEM_PATTERN = re.compile(r"^( *)([-*+]|\d+[.)])(\s+.*)$")
+
+# Indentation Python-Markdown expects for each level of list nesting
+LIST_INDENT = 4
+
+
+class _ListIndentPreprocessor(Preprocessor):
+    """
+    Re-indent nested lists to the 4-space levels Python-Markdown expects.
+    
+    LLM output usually nests lists with 2 spaces, which Python-Markdown
+    would otherwise flatten into the parent item. A list that switches
+    between bullets and numbers at the same level is also separated by a
+    blank line so that it starts a new list instead of continuing the old one.
+    Fenced code blocks have already been stashed when this runs.
+    """
+    
+    def run(self, lines: List[str]) -> List[str]:
+        output: List[str] = []
+        # Source indentation and ordered flag of each open list level
+        levels: List[List[Any]] = []
+        
+        for line in lines:
+            stripped = line.lstrip(" ")
+            indent = len(line) - len(stripped)
+            match = LIST_ITEM_PATTERN.match(line)
+            
+            if match and (levels or indent < LIST_INDENT):
+                ordered = match.group(2)[0].isdigit()
+                while levels and indent < levels[-1][0]:
+                    levels.pop()
+                if not levels or indent > levels[-1][0]:
+                    levels.append([indent, ordered])
+                elif levels[-1][1] != ordered:
+                    levels[-1][1] = ordered
+                    if output and output[-1].strip():
+                        output.append("")
+                output.append(" " * (LIST_INDENT * (len(levels) - 1)) + stripped)
+            elif not stripped:
+                output.append(line)
+            elif indent == 0 or not levels:
+                levels = []
+                output.append(line)
+            else:
+                # Continuation of the innermost item this line is indented under
+                depth = sum(1 for level in levels if level[0] < indent)
+                output.append(" " * (LIST_INDENT * max(depth, 1)) + stripped)
+        
+        return output
+
+
+# Markdown converters are not thread-safe, so each thread keeps its own
+_markdown_local = threading.local()
+
+
+def _markdown_converter() -> markdown.Markdown:
+    """
+    This thread's Markdown converter, built (and its patterns compiled) once.
+    
+    Raw HTML in the text is escaped rather than passed through, so it is
+    printed as written instead of being interpreted by the PDF renderer.
+    Fenced code blocks (e.g. Mermaid diagrams) become <pre> blocks so
+    their lines are kept.
+    """
+    md = getattr(_markdown_local, "converter", None)
+    if md is None:
+        md = markdown.Markdown(extensions=["tables", "nl2br", "fenced_code", "sane_lists"])
+        md.preprocessors.deregister("html_block")
+        md.inlinePatterns.deregister("html")
+        # After fenced_code_block (25), so code block contents are left alone
+        md.preprocessors.register(_ListIndentPreprocessor(md), "list_indent", 20)
+        _markdown_local.converter = md
+    return md
+
+
+def _markdown_to_html(text: str) -> str:
+    """Convert Markdown to HTML for write_html, keeping each line on its own line."""
+    md = _markdown_converter()
+    try:
+        return md.convert(text)
+    finally:
+        md.reset()
 
 
 class BlueprintPDFGenerator:
     """
     Utility for generating a professional PDF blueprint (Proposal SOW) from agent outputs.
     
-    Supports Markdown-style formatting (bolding with **, headers with #) and UTF-8 characters.
+    Supports Markdown formatting (headers, bold, lists and tables) and UTF-8 characters.
     """
     
     def __init__(self, blueprint_data: Dict[str, Any]):
@@ -23,10 +126,49 @@ class BlueprintPDFGenerator:
         # For simplicity and robustness, we'll stick to helvetica but handle encoding better
         self.pdf.set_font("helvetica", "B", 24)
 
-    def generate(self) -> bytes:
+    def generate(self, dest: BinaryIO) -> None:
+        """
+        Render the PDF into a binary stream, without an in-memory copy.
+        
+        Args:
+            dest: Writable binary file object the PDF is written to
+        """
+        self._render()
+        self.pdf.output(dest)
+
+    def generate_bytes(self) -> bytes:
         """
         Generate the PDF content as bytes.
         """
+        self._render()
+        
+        # Output to bytes
+        return self.pdf.output()
+
+    def write(self, dest: Union[str, Path]) -> None:
+        """
+        Render the PDF straight into a file.
+        
+        The PDF is written to a temporary file next to dest and moved into
+        place, so readers never see a partially written file.
+        
+        Args:
+            dest: Path of the PDF file to create or replace
+        """
+        dest = Path(dest)
+        fd, tmp_name = tempfile.mkstemp(dir=dest.parent, suffix=".pdf.tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                self.generate(tmp_file)
+            os.replace(tmp_name, dest)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def _render(self) -> None:
+        """
+        Lay out the blueprint content on the PDF pages.
+        """
         # 1. Header / Title
         self.pdf.set_text_color(31, 73, 125)  # Professional dark blue
         self.pdf.cell(0, 20, "Statement of Work (SOW)", ln=True, align="C")
@@ -39,58 +181,19 @@ class BlueprintPDFGenerator:
         # 2. Main Content
         content = self.data.get("content", "No content provided.")
         
-        # Process content to handle headers and bolding
-        # fpdf2's write_html is often more reliable for mixed formatting than multi_cell(markdown=True)
-        # but let's try a hybrid approach or clean multi_cell
-        
+        # Convert the Markdown once and lay it out in a single HTML pass
         self.pdf.set_font("helvetica", "", 11)
-        
-        # Split content into lines and process each
-        lines = str(content).split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                self.pdf.ln(5)
-                continue
-                
-            # Handle Headers (e.g., # Header, ## Header)
-            if line.startswith('#'):
-                # Determine header level
-                level = 0
-                for char in line:
-                    if char == '#': level += 1
-                    else: break
-                
-                header_text = line.lstrip('#').strip()
-                
-                # Header styles
-                if level == 1:
-                    self.pdf.set_font("helvetica", "B", 18)
-                    self.pdf.set_text_color(31, 73, 125)
-                elif level == 2:
-                    self.pdf.set_font("helvetica", "B", 14)
-                    self.pdf.set_text_color(50, 50, 50)
-                else:
-                    self.pdf.set_font("helvetica", "B", 12)
-                    self.pdf.set_text_color(0, 0, 0)
-                
-                self.pdf.multi_cell(0, 10, header_text)
-                self.pdf.set_font("helvetica", "", 11)
-                self.pdf.set_text_color(0, 0, 0)
-                self.pdf.ln(2)
-                
-            else:
-                # Regular line - check for bolding **text**
-                # We use write() or multi_cell with markdown=True for the whole block
-                # fpdf2's markdown support is actually quite good for **bold**
-                self.pdf.multi_cell(0, 7, line, markdown=True)
-                self.pdf.ln(1)
-        
-        # Output to bytes
-        return self.pdf.output()
+        html = _markdown_to_html(str(content))
+        self.pdf.write_html(html, font_family="helvetica", tag_styles=CONTENT_STYLES)
 
 
 def generate_blueprint_pdf(blueprint_data: Dict[str, Any]) -> bytes:
     """Convenience function to generate blueprint PDF bytes."""
     generator = BlueprintPDFGenerator(blueprint_data)
-    return generator.generate()
+    return generator.generate_bytes()
+
+
+def write_blueprint_pdf(blueprint_data: Dict[str, Any], dest: Union[str, Path]) -> None:
+    """Convenience function to render a blueprint PDF directly into a file."""
+    generator = BlueprintPDFGenerator(blueprint_data)
+    generator.write(dest)